@@ -1,23 +1,96 @@
 """Base agent class for 100x agent system."""
 
 from decimal import Decimal
+from functools import lru_cache
 from pathlib import Path
 from typing import Any
+import asyncio
+import hashlib
+import os
+import re
 import time
 
-from heart_centered_prompts import get_prompt
-from jinja2 import Environment, FileSystemLoader
-from pydantic_ai import Agent
+from jinja2 import ChoiceLoader, DictLoader, Environment, FileSystemLoader, Template
 
 from ai.core.agent_config import AgentConfig
 from ai.core.openrouter import (
+    aclose_http_clients,
     create_openrouter_model,
-    estimate_token_cost,
-    get_model_info,
+    get_model_pricing,
 )
 from helpers.logger import logger
 from helpers.observability import logfire
 
+# A bare variable substitution like {{ query }}
+_SIMPLE_VAR_RE = re.compile(r"\{\{\s*([A-Za-z_]\w*)\s*\}\}")
+
+# Names Jinja2 treats as literals rather than context lookups
+_JINJA_LITERALS = frozenset({"true", "false", "none", "True", "False", "None"})
+
+
+class _MissingAsEmpty(dict):
+    """Format context that renders missing keys as empty, like Jinja2's Undefined."""
+
+    def __missing__(self, key: str) -> str:
+        return ""
+
+
+def _to_format_string(source: str) -> str | None:
+    """Convert a template that only does bare {{ var }} substitution to a format string.
+
+    Returns None when the template needs Jinja2 (tags, comments, filters,
+    expressions, whitespace control).
+    """
+    names = _SIMPLE_VAR_RE.findall(source)
+    literal_text = _SIMPLE_VAR_RE.sub("", source)
+    if any(marker in literal_text for marker in ("{{", "{%", "{#")) or any(
+        name in _JINJA_LITERALS for name in names
+    ):
+        return None
+
+    # Escape literal braces, then turn each {{ var }} into {var}
+    parts = []
+    last = 0
+    for match in _SIMPLE_VAR_RE.finditer(source):
+        parts.append(source[last : match.start()].replace("{", "{{").replace("}", "}}"))
+        parts.append(f"{{{match.group(1)}}}")
+        last = match.end()
+    parts.append(source[last:].replace("{", "{{").replace("}", "}}"))
+    return "".join(parts)
+
+
+@lru_cache(maxsize=4)
+def _heart_centered_prompt(detail_level: str) -> str:
+    """Load a heart-centered prompt once per detail level (it's read from disk)."""
+    # Imported lazily - only needed when an agent is actually constructed
+    from heart_centered_prompts import get_prompt
+
+    return get_prompt(detail_level=detail_level)
+
+
+def _resolve_agent_file(agent_file: Path) -> tuple[Path, os.stat_result]:
+    """Find the .agent.md file for a path or bare agent name.
+
+    Each candidate is stat'ed once, and the stat result is returned so
+    loading the config doesn't stat the file again. Nothing is cached, so a
+    change of working directory or a removed file is always picked up.
+
+    Returns:
+        Tuple of (agent file path, its stat result)
+    """
+    if not agent_file.suffix:
+        agent_file = agent_file.with_suffix(".agent.md")
+
+    # Try the path as given, then in ai/agents/ directory
+    candidates = (agent_file, Path("ai/agents") / agent_file.name)
+    for candidate in candidates:
+        try:
+            return candidate, candidate.stat()
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+
+    raise FileNotFoundError(f"Agent file not found: {candidates[-1]}")
+
 
 class BaseAgent:
     """Base class for all 100x agents.
@@ -31,6 +104,30 @@ class BaseAgent:
     - Wrap execution in Logfire spans
     """
 
+    # Shared by all agents so compiled templates are cached process-wide
+    _prompt_sources: dict[str, str] = {}
+    _jinja_env: Environment | None = None
+
+    @classmethod
+    def _get_jinja_env(cls) -> Environment:
+        """Get the Jinja2 environment shared by every agent, creating it once.
+
+        Prompt sources are registered by content hash so get_template() can
+        serve them from the environment's compiled-template cache.
+        """
+        if BaseAgent._jinja_env is None:
+            # Note: autoescape=False is intentional - we're rendering prompts, not HTML
+            BaseAgent._jinja_env = Environment(
+                loader=ChoiceLoader(
+                    [
+                        DictLoader(BaseAgent._prompt_sources),
+                        FileSystemLoader(["ai/agents", "ai/agents/shared"]),
+                    ]
+                ),
+                autoescape=False,
+            )
+        return BaseAgent._jinja_env
+
     def __init__(
         self,
         agent_file: str | Path,
@@ -44,31 +141,19 @@ class BaseAgent:
             model_override: Override model from config
             temperature_override: Override temperature from config
         """
-        # Resolve agent file path
-        agent_file = Path(agent_file)
-        if not agent_file.suffix:
-            agent_file = agent_file.with_suffix(".agent.md")
-        if not agent_file.exists():
-            # Try in ai/agents/ directory
-            agent_file = Path("ai/agents") / agent_file.name
-
-        if not agent_file.exists():
-            raise FileNotFoundError(f"Agent file not found: {agent_file}")
-
-        self.agent_file = agent_file
+        self.agent_file, self._agent_stat = _resolve_agent_file(Path(agent_file))
 
         # Initialize usage tracking
         self.total_input_tokens = 0
         self.total_output_tokens = 0
-        self.total_cost = Decimal("0.00")
+        self._total_cost_micros = 0  # Integer micro-dollars, converted at read time
         self.query_count = 0
 
-        # Set up Jinja2 environment for includes (BEFORE loading config)
-        # Note: autoescape=False is intentional - we're rendering prompts, not HTML
-        self.jinja_env = Environment(
-            loader=FileSystemLoader(["ai/agents", "ai/agents/shared"]),
-            autoescape=False,
-        )
+        # Only build span usage attributes when telemetry is actually exported
+        self._observe = logfire.enabled
+
+        # Jinja2 environment for includes, shared by all agents (BEFORE loading config)
+        self.jinja_env = self._get_jinja_env()
 
         # Load configuration
         self._load_config(model_override, temperature_override)
@@ -79,8 +164,11 @@ class BaseAgent:
         temperature_override: float | None = None,
     ) -> None:
         """Load agent configuration and set up the Pydantic AI agent."""
+        # Imported lazily so importing BaseAgent stays cheap for tooling
+        from pydantic_ai import Agent
+
         # Load agent configuration
-        self.config = AgentConfig.from_file(self.agent_file)
+        self.config = AgentConfig.from_file(self.agent_file, stat=self._agent_stat)
 
         # Apply overrides (explicit None check to honor zero values)
         self.model_name = (
@@ -100,6 +188,13 @@ class BaseAgent:
             except ValueError as e:
                 logger.warning(f"Could not load output schema: {e}")
 
+        # Compile prompt templates once (sources are static per agent)
+        self._system_template = self._compile_prompt(self.config.system_prompt)
+        self._user_template = self._compile_prompt(self.config.user_prompt)
+
+        # Simple user prompts render with str.format_map instead of Jinja2
+        self._user_format = _to_format_string(self.config.user_prompt)
+
         # Create OpenRouter model
         model = create_openrouter_model(
             model_name=self.model_name,
@@ -107,21 +202,32 @@ class BaseAgent:
             settings={"temperature": self.temperature},
         )
 
+        # Resolve per-token pricing once (model is fixed per agent)
+        self._pricing = get_model_pricing(self.model_name)
+
+        # Static system prompt context: heart-centered prompt + agent metadata
+        self._static_prompt_ctx = {
+            "heart_centered_prompt": _heart_centered_prompt("terse"),
+            "agent_name": self.config.name,
+            "agent_description": self.config.description,
+            "model_name": self.model_name,
+        }
+
         # Render system prompt once (it's static per agent)
-        system_prompt_text = self._render_system_prompt({})
+        self._rendered_system_prompt = self._render_system_prompt({})
 
         # Create Pydantic AI agent
         if self.result_type is not None:
             self.agent = Agent(
                 model=model,
                 output_type=self.result_type,
-                system_prompt=system_prompt_text,
+                system_prompt=self._rendered_system_prompt,
                 defer_model_check=True,
             )
         else:
             self.agent = Agent(
                 model=model,
-                system_prompt=system_prompt_text,
+                system_prompt=self._rendered_system_prompt,
                 defer_model_check=True,
             )
 
@@ -151,76 +257,176 @@ class BaseAgent:
         if user_message is None and not user_context:
             raise ValueError("Must provide either user_message or user_context")
 
+        # Render and validate before opening the span so failed calls skip it
+        if user_message:
+            user_prompt = user_message
+        else:
+            user_prompt = self._render_user_prompt(user_context or {})
+
+        if not user_prompt:
+            raise ValueError("No user prompt provided")
+
         with logfire.span(
             f"🧠 {self.config.name} query",
             model=self.model_name,
             has_user_message=user_message is not None,
         ) as span:
-            start_time = time.monotonic()
-
-            # Render user prompt
-            if user_message:
-                user_prompt = user_message
-            else:
-                user_prompt = self._render_user_prompt(user_context or {})
-
-            if not user_prompt:
-                raise ValueError("No user prompt provided")
+            start_ns = time.perf_counter_ns()
 
             # Execute the query synchronously
             result = self.agent.run_sync(user_prompt)
 
             # Track usage
-            self.query_count += 1
-            usage = result.usage() if callable(result.usage) else result.usage
+            self._track_usage(result, span, start_ns)
 
-            if usage:
-                input_tokens = usage.input_tokens
-                output_tokens = usage.output_tokens
+            return result.output
 
-                self.total_input_tokens += input_tokens
-                self.total_output_tokens += output_tokens
+    async def run_batch_async(
+        self, prompts: list[str], *, max_concurrency: int = 32
+    ) -> list[Any]:
+        """Query the agent with many user prompts concurrently.
 
-                query_cost = estimate_token_cost(
-                    self.model_name, input_tokens, output_tokens
-                )
-                self.total_cost += Decimal(str(query_cost))
-
-                # Detailed cost breakdown
-                model_info = get_model_info(self.model_name)
-                pricing = model_info["pricing"]
-                input_cost = (input_tokens / 1_000_000) * pricing["input_per_million"]
-                output_cost = (output_tokens / 1_000_000) * pricing[
-                    "output_per_million"
-                ]
-
-                duration_s = time.monotonic() - start_time
-                total_tokens = input_tokens + output_tokens
-                tokens_per_second = total_tokens / duration_s if duration_s else 0.0
-
-                span.set_attributes(
-                    {
-                        "usage.input_tokens": input_tokens,
-                        "usage.output_tokens": output_tokens,
-                        "usage.total_tokens": total_tokens,
-                        "usage.duration_ms": int(duration_s * 1000),
-                        "usage.tokens_per_second": tokens_per_second,
-                        "cost.input_usd": float(input_cost),
-                        "cost.output_usd": float(output_cost),
-                        "cost.total_usd": float(query_cost),
-                        "accumulated.total_cost_usd": float(self.total_cost),
-                    }
+        Args:
+            prompts: Rendered user prompts, one per query
+            max_concurrency: Maximum number of LLM requests in flight at once
+
+        Returns:
+            Agent responses in the same order as prompts
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        if not all(prompts):
+            raise ValueError("No user prompt provided")
+
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def run_one(user_prompt: str) -> Any:
+            async with semaphore:
+                with logfire.span(
+                    f"🧠 {self.config.name} query",
+                    model=self.model_name,
+                    has_user_message=True,
+                ) as span:
+                    start_ns = time.perf_counter_ns()
+                    result = await self.agent.run(user_prompt)
+                    self._track_usage(result, span, start_ns)
+                    return result.output
+
+        with logfire.span(
+            f"📦 {self.config.name} batch",
+            model=self.model_name,
+            batch_size=len(prompts),
+        ):
+            return await asyncio.gather(*(run_one(p) for p in prompts))
+
+    def run_batch(self, prompts: list[str], *, max_concurrency: int = 32) -> list[Any]:
+        """Synchronous wrapper around run_batch_async.
+
+        The batch runs on its own event loop. Shared HTTP clients keep a
+        connection pool per loop, so that loop's pools are closed before it
+        shuts down.
+
+        Raises:
+            RuntimeError: If called while an event loop is running in this thread
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            raise RuntimeError(
+                "run_batch() can't be called from a running event loop; "
+                "await run_batch_async() instead"
+            )
+
+        async def run_and_close() -> list[Any]:
+            try:
+                return await self.run_batch_async(
+                    prompts, max_concurrency=max_concurrency
                 )
+            finally:
+                await aclose_http_clients()
+
+        return asyncio.run(run_and_close())
+
+    def _track_usage(self, result: Any, span: Any, start_ns: int) -> None:
+        """Accumulate token usage and cost for a completed run."""
+        self.query_count += 1
+        usage = result.usage()  # AgentRunResult.usage is a method in pydantic-ai 1.x
+
+        if usage:
+            input_tokens = usage.input_tokens
+            output_tokens = usage.output_tokens
+
+            self.total_input_tokens += input_tokens
+            self.total_output_tokens += output_tokens
+
+            # Cost breakdown from pricing resolved at init
+            input_cost = input_tokens * self._pricing.input_per_token
+            output_cost = output_tokens * self._pricing.output_per_token
+            query_cost = input_cost + output_cost
+            self._total_cost_micros += round(query_cost * 1_000_000)
 
-                logger.info(
-                    f"💰 {self.config.name} usage",
+            duration_ns = time.perf_counter_ns() - start_ns
+
+            # Span attributes are only worth building when Logfire exports them
+            if self._observe:
+                self._record_cost(
+                    span,
                     input_tokens=input_tokens,
                     output_tokens=output_tokens,
-                    duration_ms=int(duration_s * 1000),
-                    cost_usd=f"${query_cost:.4f}",
+                    input_cost=input_cost,
+                    output_cost=output_cost,
+                    duration_ns=duration_ns,
                 )
 
-            return result.output
+            logger.info(
+                f"💰 {self.config.name} usage",
+                input_tokens=input_tokens,
+                output_tokens=output_tokens,
+                duration_ms=duration_ns // 1_000_000,
+                cost_usd=f"${query_cost:.4f}",
+            )
+
+    def _record_cost(
+        self,
+        span: Any,
+        *,
+        input_tokens: int,
+        output_tokens: int,
+        input_cost: float,
+        output_cost: float,
+        duration_ns: int,
+    ) -> None:
+        """Attach usage and cost breakdown attributes to the query span."""
+        total_tokens = input_tokens + output_tokens
+        tokens_per_second = (
+            total_tokens * 1_000_000_000 / duration_ns if duration_ns else 0.0
+        )
+
+        span.set_attributes(
+            {
+                "usage.input_tokens": input_tokens,
+                "usage.output_tokens": output_tokens,
+                "usage.total_tokens": total_tokens,
+                "usage.duration_ms": duration_ns // 1_000_000,
+                "usage.tokens_per_second": tokens_per_second,
+                "cost.input_usd": input_cost,
+                "cost.output_usd": output_cost,
+                "cost.total_usd": input_cost + output_cost,
+                "accumulated.total_cost_usd": self._total_cost_micros / 1_000_000,
+            }
+        )
+
+    def _compile_prompt(self, source: str) -> Template:
+        """Compile a prompt source through the environment's template cache.
+
+        Identical sources map to the same template name, so they share one
+        compiled Template instead of being recompiled.
+        """
+        name = f"prompt:{hashlib.sha256(source.encode()).hexdigest()}"
+        self._prompt_sources[name] = source
+        return self.jinja_env.get_template(name)
 
     def _render_system_prompt(self, context: dict[str, Any]) -> str:
         """Render the system prompt template with context.
@@ -231,21 +437,10 @@ class BaseAgent:
         Returns:
             Rendered system prompt
         """
-        # Add heart-centered prompt
-        context["heart_centered_prompt"] = get_prompt(detail_level="terse")
-
-        # Add agent metadata
-        context.update(
-            {
-                "agent_name": self.config.name,
-                "agent_description": self.config.description,
-                "model_name": self.model_name,
-            }
-        )
-
-        # Render using Jinja2 (supports includes)
-        template = self.jinja_env.from_string(self.config.system_prompt)
-        return template.render(context)
+        # Render using the precompiled Jinja2 template (supports includes).
+        # Merge into a fresh dict so the caller's context isn't mutated;
+        # agent metadata and heart-centered prompt take precedence.
+        return self._system_template.render({**context, **self._static_prompt_ctx})
 
     def _render_user_prompt(self, context: dict[str, Any]) -> str:
         """Render the user prompt template with context.
@@ -256,15 +451,21 @@ class BaseAgent:
         Returns:
             Rendered user prompt
         """
-        context.update(
-            {
-                "agent_name": self.config.name,
-                "query_count": self.query_count,
-            }
-        )
+        context = {
+            **context,
+            "agent_name": self.config.name,
+            "query_count": self.query_count,
+        }
+
+        if self._user_format is not None:
+            return self._user_format.format_map(_MissingAsEmpty(context))
+
+        return self._user_template.render(context)
 
-        template = self.jinja_env.from_string(self.config.user_prompt)
-        return template.render(context)
+    @property
+    def total_cost(self) -> Decimal:
+        """Accumulated cost in USD across all queries."""
+        return Decimal(self._total_cost_micros) / 1_000_000
 
     def get_usage_summary(self) -> dict[str, Any]:
         """Get usage statistics for this agent instance.
@@ -272,6 +473,7 @@ class BaseAgent:
         Returns:
             Dictionary with usage metrics
         """
+        total_cost = self._total_cost_micros / 1_000_000
         return {
             "agent_name": self.config.name,
             "model": self.model_name,
@@ -279,9 +481,9 @@ class BaseAgent:
             "query_count": self.query_count,
             "total_input_tokens": self.total_input_tokens,
             "total_output_tokens": self.total_output_tokens,
-            "total_cost": float(self.total_cost),
+            "total_cost": total_cost,
             "average_cost_per_query": (
-                float(self.total_cost / self.query_count) if self.query_count else 0.0
+                total_cost / self.query_count if self.query_count else 0.0
             ),
             "has_structured_output": self.result_type is not None,
             "version": self.config.latest_version,
@@ -302,5 +504,5 @@ class BaseAgent:
             f"name='{self.config.name}', "
             f"model='{self.model_name}', "
             f"queries={self.query_count}, "
-            f"cost=${self.total_cost:.4f})"
+            f"cost=${self._total_cost_micros / 1_000_000:.4f})"
         )
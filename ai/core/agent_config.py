@@ -1,16 +1,159 @@
 """Agent configuration parser for .agent.md files."""
 
 from dataclasses import dataclass, field
-from functools import lru_cache
+from functools import cached_property, lru_cache
 from pathlib import Path
 from typing import Any
+import os
 import re
+import time
 
-from jinja2 import Template, TemplateSyntaxError
-import frontmatter
+from jinja2 import Environment, Template, TemplateSyntaxError
+import yaml
 
 from helpers.logger import logger
 
+# Prefer the libyaml-backed loader when available
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# Shared environment for rendering and syntax-checking prompt templates, also
+# used by the validators. Agents with includes use BaseAgent's loader-backed one.
+JINJA_ENV = Environment(autoescape=False)
+
+# Section marker: <!-- Section Name --> followed by a fenced code block.
+# Captures: comment text, optional language, content
+_SECTION_RE = re.compile(r"<!-- ([\w\s]+) -->\s*```(\w+)?\n(.*?)```", re.DOTALL)
+
+# A file modified more recently than this may change again without its mtime
+# moving (timestamps are as coarse as 2s on some filesystems), so it isn't cached
+_SETTLE_NS = 2_000_000_000
+
+# Identifies one version of a file: (mtime, ctime, inode, size)
+FileVersion = tuple[int, int, int, int]
+
+
+def file_version(stat: os.stat_result) -> FileVersion | None:
+    """Cache key for the version of a file described by stat.
+
+    Returns None when the file was modified too recently to trust its
+    timestamps, meaning the caller shouldn't cache anything for it.
+    """
+    if time.time_ns() - stat.st_mtime_ns < _SETTLE_NS:
+        return None
+    return (stat.st_mtime_ns, stat.st_ctime_ns, stat.st_ino, stat.st_size)
+
+
+def is_static_template(source: str) -> bool:
+    """Whether source has no Jinja2 markers, so there is nothing to parse."""
+    return "{{" not in source and "{%" not in source and "{#" not in source
+
+
+@lru_cache(maxsize=128)
+def _get_template(source: str) -> Template:
+    """Compile a prompt template once per distinct source."""
+    return JINJA_ENV.from_string(source)
+
+
+@lru_cache(maxsize=512)
+def _build_output_model(source: str, agent_name: str):
+    """Build the Output class from schema source.
+
+    Cached by source so re-parsed configs with an unchanged schema (e.g. after
+    an unrelated edit to the file) skip the exec and Pydantic model creation.
+    """
+    # Execute the Python code to get the Output class
+    # Note: exec is intentional - we're loading Pydantic models from .agent.md files
+    namespace = {}
+    try:
+        exec(compile(source, f"<{agent_name}:Output>", "exec"), namespace)
+    except Exception as e:
+        raise ValueError(f"Failed to execute output schema code: {e}") from e
+
+    if "Output" not in namespace:
+        raise ValueError(
+            f"Output schema must define a class named 'Output'. Found: {list(namespace.keys())}"
+        )
+
+    return namespace["Output"]
+
+
+@lru_cache(maxsize=512)
+def _validate_config_inputs(
+    *,
+    name: Any,
+    description: Any,
+    model: Any,
+    system_prompt: str,
+    user_prompt: str,
+    temperature: Any,
+) -> tuple[str, ...]:
+    """Check the config values AgentConfig.validate looks at.
+
+    Cached on the values themselves, so repeat validations of the same content
+    (including re-parsed copies of an unchanged file) skip the template checks.
+    """
+    errors = []
+
+    # Check required fields
+    if not name:
+        errors.append("Missing required field: name")
+
+    if not description:
+        errors.append("Missing required field: description")
+
+    if not model:
+        errors.append("Missing required field: model")
+
+    # Check for prompts
+    if not system_prompt:
+        errors.append("Missing system prompt section")
+
+    if not user_prompt:
+        errors.append("Missing user prompt section")
+
+    # Validate Jinja2 template syntax (static prompts can't have errors)
+    if system_prompt and not is_static_template(system_prompt):
+        try:
+            JINJA_ENV.compile(system_prompt, raw=True)
+        except TemplateSyntaxError as e:
+            errors.append(f"Invalid Jinja2 syntax in system prompt: {e}")
+
+    if user_prompt and not is_static_template(user_prompt):
+        try:
+            JINJA_ENV.compile(user_prompt, raw=True)
+        except TemplateSyntaxError as e:
+            errors.append(f"Invalid Jinja2 syntax in user prompt: {e}")
+
+    # Validate temperature
+    if temperature is not None and (
+        not isinstance(temperature, int | float) or not 0 <= temperature <= 2
+    ):
+        errors.append("Temperature must be a number between 0 and 2")
+
+    return tuple(errors)
+
+
+def _parse_frontmatter(text: str) -> tuple[dict[str, Any], str]:
+    """Split YAML frontmatter from the markdown body.
+
+    Handles the standard ``---`` header layout directly and only YAML-parses the
+    header. Anything unusual falls back to python-frontmatter.
+
+    Returns:
+        Tuple of (metadata, content)
+    """
+    if text.startswith("---\n"):
+        end = text.find("\n---\n", 3)
+        if end != -1:
+            metadata = yaml.load(text[4:end], Loader=_YAML_LOADER)  # noqa: S506
+            if isinstance(metadata, dict):
+                return metadata, text[end + 5 :].strip()
+
+    # Imported lazily - only needed for non-standard frontmatter layouts
+    import frontmatter
+
+    return frontmatter.parse(text)
+
 
 @dataclass
 class AgentConfig:
@@ -28,13 +171,18 @@ class AgentConfig:
     # Raw content for debugging
     raw_content: str = ""
 
+    # Full file text including frontmatter, so validators don't re-read the file
+    source_text: str = field(default="", repr=False)
+
     @classmethod
-    @lru_cache(maxsize=32)
-    def from_file(cls, file_path: Path | str) -> "AgentConfig":
+    def from_file(
+        cls, file_path: Path | str, *, stat: os.stat_result | None = None
+    ) -> "AgentConfig":
         """Load agent configuration from .agent.md file.
 
         Args:
             file_path: Path to the .agent.md file
+            stat: The file's stat result, if the caller already stat'ed it
 
         Returns:
             AgentConfig instance with parsed content
@@ -43,15 +191,33 @@ class AgentConfig:
             FileNotFoundError: If the file doesn't exist
             ValueError: If the file format is invalid
         """
-        file_path = Path(file_path)
+        # Resolve so equivalent spellings of a path share one cache entry, and
+        # key on the file version so edited files are re-parsed automatically
+        file_path = Path(file_path).resolve()
+        if stat is None:
+            try:
+                stat = file_path.stat()
+            except FileNotFoundError:
+                raise FileNotFoundError(
+                    f"Agent config not found: {file_path}"
+                ) from None
 
-        if not file_path.exists():
-            raise FileNotFoundError(f"Agent config not found: {file_path}")
+        version = file_version(stat)
+        if version is None:
+            return cls._parse_file(file_path)
+        return cls._load_file(file_path, version)
 
-        # Parse with python-frontmatter
-        post = frontmatter.load(file_path)
-        config_dict = post.metadata
-        content = post.content
+    @classmethod
+    @lru_cache(maxsize=32)
+    def _load_file(cls, file_path: Path, version: FileVersion) -> "AgentConfig":  # noqa: ARG003
+        """Parse a resolved .agent.md path (cached per path and file version)."""
+        return cls._parse_file(file_path)
+
+    @classmethod
+    def _parse_file(cls, file_path: Path) -> "AgentConfig":
+        """Parse a resolved .agent.md path."""
+        source_text = file_path.read_text(encoding="utf-8")
+        config_dict, content = _parse_frontmatter(source_text)
 
         # Extract sections using HTML comment markers
         sections = cls._parse_sections(content)
@@ -69,12 +235,14 @@ class AgentConfig:
             output_schema_code=sections.get("output_schema", ""),
             context_builder_code=sections.get("context_builder", ""),
             raw_content=content,
+            source_text=source_text,
         )
 
     @classmethod
     def clear_cache(cls):
         """Clear the agent config cache. Useful for testing or when files change."""
-        cls.from_file.cache_clear()
+        cls._load_file.cache_clear()
+        _validate_config_inputs.cache_clear()
         logger.debug("🗑️  Agent config cache cleared")
 
     @staticmethod
@@ -95,11 +263,7 @@ class AgentConfig:
         """
         sections = {}
 
-        # Pattern: <!-- ([\w\s]+) -->\s*```(\w+)?\n(.*?)```
-        # Captures: comment text, optional language, content
-        pattern = r"<!-- ([\w\s]+) -->\s*```(\w+)?\n(.*?)```"
-
-        for match in re.finditer(pattern, content, re.DOTALL):
+        for match in _SECTION_RE.finditer(content):
             section_name = match.group(1)  # "System Prompt"
             language = match.group(2)  # "jinja2" or None
             code = match.group(3).strip()  # The actual content
@@ -137,8 +301,7 @@ class AgentConfig:
             }
         )
 
-        template = Template(self.system_prompt)
-        return template.render(context)
+        return _get_template(self.system_prompt).render(context)
 
     def render_user_prompt(self, context: dict[str, Any] | None = None) -> str:
         """Render the user prompt template with context.
@@ -155,8 +318,7 @@ class AgentConfig:
         if context is None:
             context = {}
 
-        template = Template(self.user_prompt)
-        return template.render(context)
+        return _get_template(self.user_prompt).render(context)
 
     def get_output_model(self):
         """Extract and instantiate the Output class from output schema code.
@@ -170,20 +332,12 @@ class AgentConfig:
         if not self.output_schema_code:
             raise ValueError(f"No output schema defined for {self.name}")
 
-        # Execute the Python code to get the Output class
-        # Note: exec is intentional - we're loading Pydantic models from .agent.md files
-        namespace = {}
-        try:
-            exec(self.output_schema_code, namespace)
-        except Exception as e:
-            raise ValueError(f"Failed to execute output schema code: {e}") from e
-
-        if "Output" not in namespace:
-            raise ValueError(
-                f"Output schema must define a class named 'Output'. Found: {list(namespace.keys())}"
-            )
+        return self._output_model
 
-        return namespace["Output"]
+    @cached_property
+    def _output_model(self):
+        """Output class for this config's schema (cached after first success)."""
+        return _build_output_model(self.output_schema_code, self.name)
 
     def validate(self) -> list[str]:
         """Validate the agent configuration for required fields.
@@ -191,46 +345,20 @@ class AgentConfig:
         Returns:
             List of validation errors (empty if valid)
         """
-        errors = []
-
-        # Check required fields
-        if not self.config.get("name"):
-            errors.append("Missing required field: name")
-
-        if not self.config.get("description"):
-            errors.append("Missing required field: description")
-
-        if not self.config.get("model"):
-            errors.append("Missing required field: model")
-
-        # Check for prompts
-        if not self.system_prompt:
-            errors.append("Missing system prompt section")
-
-        if not self.user_prompt:
-            errors.append("Missing user prompt section")
-
-        # Validate Jinja2 template syntax
-        if self.system_prompt:
-            try:
-                Template(self.system_prompt)
-            except TemplateSyntaxError as e:
-                errors.append(f"Invalid Jinja2 syntax in system prompt: {e}")
-
-        if self.user_prompt:
-            try:
-                Template(self.user_prompt)
-            except TemplateSyntaxError as e:
-                errors.append(f"Invalid Jinja2 syntax in user prompt: {e}")
-
-        # Validate temperature
-        temperature = self.config.get("temperature")
-        if temperature is not None and (
-            not isinstance(temperature, int | float) or not 0 <= temperature <= 2
-        ):
-            errors.append("Temperature must be a number between 0 and 2")
-
-        return errors
+        inputs = {
+            "name": self.config.get("name"),
+            "description": self.config.get("description"),
+            "model": self.config.get("model"),
+            "system_prompt": self.system_prompt,
+            "user_prompt": self.user_prompt,
+            "temperature": self.config.get("temperature"),
+        }
+        try:
+            errors = _validate_config_inputs(**inputs)
+        except TypeError:
+            # Unhashable frontmatter values (e.g. a list) can't be cached
+            errors = _validate_config_inputs.__wrapped__(**inputs)
+        return list(errors)
 
     @property
     def name(self) -> str:
@@ -257,11 +385,25 @@ class AgentConfig:
 
     @property
     def latest_version(self) -> int:
-        """Get the latest version number from evolution history."""
-        history = self.config.get("evolution_history", [])
-        if not history:
+        """Get the latest version number from evolution history.
+
+        Malformed entries (not a mapping, or a version that isn't an integer)
+        are skipped rather than failing, so validation can still report on
+        the rest of the file.
+        """
+        history = self.config.get("evolution_history") or []
+        if not isinstance(history, list):
             return 1
-        return max(entry.get("version", 1) for entry in history)
+
+        versions = []
+        for entry in history:
+            if not isinstance(entry, dict):
+                continue
+            try:
+                versions.append(int(entry.get("version", 1)))
+            except (TypeError, ValueError):
+                continue
+        return max(versions, default=1)
 
     def explain(self) -> str:
         """Explain what this agent does.
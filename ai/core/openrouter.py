@@ -7,17 +7,24 @@ This module provides sophisticated OpenRouter integration with:
 - Comprehensive token cost tracking
 """
 
-from dataclasses import dataclass, replace
-from typing import Any, Literal
-
-from pydantic import BaseModel, Field
+from collections.abc import AsyncIterator, Mapping, Sequence
+from dataclasses import asdict, dataclass, replace
+from functools import cached_property, lru_cache
+from types import MappingProxyType
+from typing import Any, Literal, NamedTuple
+import asyncio
+import hashlib
+import time
+import weakref
+
+from cachetools import TTLCache
 from pydantic_ai.exceptions import ModelHTTPError
-from pydantic_ai.messages import ModelResponse
+from pydantic_ai.messages import ModelRequest, ModelResponse, UserPromptPart
+from pydantic_ai.models import ModelRequestParameters
 from pydantic_ai.models.openai import OpenAIChatModel, chat
 from pydantic_ai.providers.openrouter import OpenRouterProvider
-import arrow
 import httpx
-import ujson
+import orjson
 
 from ai.core.config import config
 from helpers.logger import logger
@@ -27,7 +34,7 @@ from helpers.observability import logfire
 # ruff: noqa: SLF001
 
 # Model registry with pricing and fallbacks
-SUPPORTED_MODELS = {
+_MODEL_SPECS: dict[str, dict[str, Any]] = {
     "anthropic/claude-opus-4.1": {
         "name": "Claude Opus 4.1",
         "description": "Most capable Claude model for complex reasoning",
@@ -35,8 +42,8 @@ SUPPORTED_MODELS = {
         "max_output": 32_000,
         "supports_vision": True,
         "pricing": {"input_per_million": 15.0, "output_per_million": 75.0},
-        "recommended_for": ["complex_analysis", "strategic_decisions"],
-        "fallback_models": ["openai/o1-pro", "anthropic/claude-sonnet-4.5"],
+        "recommended_for": ("complex_analysis", "strategic_decisions"),
+        "fallback_models": ("openai/o1-pro", "anthropic/claude-sonnet-4.5"),
     },
     "anthropic/claude-sonnet-4.5": {
         "name": "Claude Sonnet 4.5",
@@ -45,8 +52,8 @@ SUPPORTED_MODELS = {
         "max_output": 64_000,
         "supports_vision": True,
         "pricing": {"input_per_million": 3.0, "output_per_million": 15.0},
-        "recommended_for": ["general_use", "agent_operations", "code_generation"],
-        "fallback_models": ["anthropic/claude-3.5-haiku", "openai/gpt-5"],
+        "recommended_for": ("general_use", "agent_operations", "code_generation"),
+        "fallback_models": ("anthropic/claude-3.5-haiku", "openai/gpt-5"),
     },
     "anthropic/claude-3.5-haiku": {
         "name": "Claude 3.5 Haiku",
@@ -55,8 +62,8 @@ SUPPORTED_MODELS = {
         "max_output": 8_192,
         "supports_vision": False,
         "pricing": {"input_per_million": 1.0, "output_per_million": 5.0},
-        "recommended_for": ["quick_analysis", "high_volume"],
-        "fallback_models": ["openai/gpt-5-mini"],
+        "recommended_for": ("quick_analysis", "high_volume"),
+        "fallback_models": ("openai/gpt-5-mini",),
     },
     "openai/gpt-5": {
         "name": "GPT-5",
@@ -65,8 +72,8 @@ SUPPORTED_MODELS = {
         "max_output": 16_384,
         "supports_vision": True,
         "pricing": {"input_per_million": 1.25, "output_per_million": 10.0},
-        "recommended_for": ["complex_analysis", "strategic_decisions"],
-        "fallback_models": ["anthropic/claude-sonnet-4.5", "openai/gpt-5-mini"],
+        "recommended_for": ("complex_analysis", "strategic_decisions"),
+        "fallback_models": ("anthropic/claude-sonnet-4.5", "openai/gpt-5-mini"),
     },
     "openai/gpt-5-mini": {
         "name": "GPT-5 Mini",
@@ -75,8 +82,8 @@ SUPPORTED_MODELS = {
         "max_output": 16_384,
         "supports_vision": True,
         "pricing": {"input_per_million": 0.15, "output_per_million": 0.6},
-        "recommended_for": ["quick_decisions", "vision_analysis"],
-        "fallback_models": ["anthropic/claude-3.5-haiku"],
+        "recommended_for": ("quick_decisions", "vision_analysis"),
+        "fallback_models": ("anthropic/claude-3.5-haiku",),
     },
     "openai/o1-pro": {
         "name": "O1 Pro",
@@ -85,109 +92,454 @@ SUPPORTED_MODELS = {
         "max_output": 100_000,
         "supports_vision": False,
         "pricing": {"input_per_million": 15.0, "output_per_million": 60.0},
-        "recommended_for": ["deep_reasoning", "strategy_development"],
-        "fallback_models": ["anthropic/claude-opus-4.1"],
+        "recommended_for": ("deep_reasoning", "strategy_development"),
+        "fallback_models": ("anthropic/claude-opus-4.1",),
     },
 }
 
+# Read-only view; list-valued fields are tuples so entries are safe to share.
+# Provider family is derived from the model name once here.
+SUPPORTED_MODELS: Mapping[str, dict[str, Any]] = MappingProxyType(
+    {
+        model_name: {
+            **specs,
+            "provider": model_name.split("/", 1)[0],
+            "is_anthropic": model_name.startswith("anthropic/"),
+        }
+        for model_name, specs in _MODEL_SPECS.items()
+    }
+)
+
+# Model names precomputed for cheap listing and membership checks
+_SUPPORTED_MODEL_NAMES = tuple(SUPPORTED_MODELS)
+_SUPPORTED_MODEL_NAMES_SET = frozenset(SUPPORTED_MODELS)
+_IS_ANTHROPIC = {
+    model_name: specs["is_anthropic"] for model_name, specs in SUPPORTED_MODELS.items()
+}
+_VISION_MODEL_NAMES = tuple(
+    model_name
+    for model_name, specs in SUPPORTED_MODELS.items()
+    if specs["supports_vision"]
+)
+
+
+class ModelPricing(NamedTuple):
+    """Per-token USD pricing for a model."""
+
+    input_per_token: float
+    output_per_token: float
+    cache_read_per_token: float
+    cache_write_per_token: float
+
+
+# Anthropic prompt caching price multipliers relative to the input rate
+_ANTHROPIC_CACHE_READ_MULTIPLIER = 0.1
+_ANTHROPIC_CACHE_WRITE_MULTIPLIER = 1.25
+
+
+def _build_pricing(pricing: Mapping[str, float], *, is_anthropic: bool) -> ModelPricing:
+    """Resolve per-token pricing from per-million registry prices."""
+    input_per_token = pricing["input_per_million"] / 1_000_000
+
+    # Only Anthropic caching is enabled by this module; other providers' cached
+    # tokens are conservatively priced as regular input
+    read_multiplier = write_multiplier = 1.0
+    if is_anthropic:
+        read_multiplier = _ANTHROPIC_CACHE_READ_MULTIPLIER
+        write_multiplier = _ANTHROPIC_CACHE_WRITE_MULTIPLIER
+
+    return ModelPricing(
+        input_per_token=input_per_token,
+        output_per_token=pricing["output_per_million"] / 1_000_000,
+        cache_read_per_token=input_per_token * read_multiplier,
+        cache_write_per_token=input_per_token * write_multiplier,
+    )
+
+
+# Per-token pricing resolved once from the registry
+MODEL_PRICING = {
+    model_name: _build_pricing(specs["pricing"], is_anthropic=specs["is_anthropic"])
+    for model_name, specs in SUPPORTED_MODELS.items()
+}
+
+
+def _set_request_content(request: httpx.Request, content: bytes) -> None:
+    """Replace a request body in place.
+
+    The stream is what actually gets sent, and content has no setter.
+    """
+    request._content = content
+    request.stream = httpx.ByteStream(content)
+    request.headers["content-length"] = str(len(content))
+
+
+# Local response cache bounds (only used when explicitly enabled)
+_LOCAL_CACHE_MAXSIZE = 2048
+_LOCAL_CACHE_TTL = 600.0
+
+
+class _AiohttpResponseStream(httpx.AsyncByteStream):
+    """Response body streamed from an aiohttp response, still encoded.
+
+    aiohttp errors raised while reading the body are mapped to their httpx
+    equivalents, so the OpenAI client's retry handling still applies.
+    """
+
+    def __init__(self, response: Any, request: httpx.Request):
+        self._response = response
+        self._request = request
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        import aiohttp
+
+        try:
+            async for chunk in self._response.content.iter_chunked(65_536):
+                yield chunk
+        except TimeoutError as e:
+            raise httpx.ReadTimeout(str(e), request=self._request) from e
+        except aiohttp.ClientError as e:
+            raise httpx.ReadError(str(e), request=self._request) from e
+
+    async def aclose(self) -> None:
+        self._response.release()
+
+
+class _AiohttpTransport(httpx.AsyncBaseTransport):
+    """httpx transport that sends requests through an aiohttp session.
+
+    aiohttp's connection pool holds up much better than httpcore's under high
+    concurrency. httpx (and so the OpenAI client) still handles request
+    building, response decoding and retries on top of it.
+
+    The session belongs to the event loop it was created on, so
+    OpenRouterTransport keeps one of these per loop and closes it through
+    aclose().
+    """
+
+    def __init__(self, limits: httpx.Limits):
+        self._limits = limits
+        self._session = None
+
+    def _get_session(self) -> Any:
+        """Create the session lazily, inside the running event loop."""
+        if self._session is None or self._session.closed:
+            # Imported lazily - only needed when direct mode is enabled
+            import aiohttp
+
+            connector = aiohttp.TCPConnector(
+                limit=self._limits.max_connections or 0,
+                keepalive_timeout=self._limits.keepalive_expiry,
+            )
+            # httpx decodes content-encoding itself, so keep bodies raw here
+            self._session = aiohttp.ClientSession(
+                connector=connector, auto_decompress=False
+            )
+        return self._session
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        """Send the request over aiohttp and wrap the response for httpx."""
+        import aiohttp
+
+        timeout = request.extensions.get("timeout", {})
+        try:
+            response = await self._get_session().request(
+                request.method,
+                str(request.url),
+                headers=[
+                    (key.decode("latin-1"), value.decode("latin-1"))
+                    for key, value in request.headers.raw
+                ],
+                data=request.content,
+                allow_redirects=False,
+                timeout=aiohttp.ClientTimeout(
+                    sock_connect=timeout.get("connect"),
+                    sock_read=timeout.get("read"),
+                ),
+            )
+        except TimeoutError as e:
+            raise httpx.TimeoutException(str(e), request=request) from e
+        except aiohttp.ClientError as e:
+            raise httpx.TransportError(str(e), request=request) from e
+
+        return httpx.Response(
+            response.status,
+            headers=list(response.raw_headers),
+            stream=_AiohttpResponseStream(response, request),
+            request=request,
+        )
+
+    async def aclose(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+
 
 # HTTP Transport Interceptor
-class OpenRouterTransport(httpx.AsyncHTTPTransport):
-    """Custom HTTP transport that intercepts OpenRouter requests and properly
-    injects reasoning/routing parameters at the top level of the JSON body.
+class OpenRouterTransport(httpx.AsyncBaseTransport):
+    """Custom HTTP transport that intercepts OpenRouter chat completion requests.
+
+    Logs each request to Logfire and serves repeated deterministic requests
+    from a local response cache when create_openrouter_model(enable_local_cache=True)
+    (or OpenRouterSettings.enable_local_cache) flags them. With direct=True, requests are sent over aiohttp instead of httpx's
+    own connection pool.
+
+    Connections are bound to the event loop that opened them, so each loop
+    gets its own pool. A client shared across asyncio.run() calls (or
+    run_sync's loop and a batch loop) never reuses another loop's connections.
     """
 
+    def __init__(self, *, limits: httpx.Limits | None = None, direct: bool = False):
+        """Create the transport with an empty local response cache."""
+        self._limits = limits or httpx.Limits()
+        self._direct = direct
+        self._pools: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, httpx.AsyncBaseTransport
+        ] = weakref.WeakKeyDictionary()
+        self._response_cache: TTLCache[bytes, tuple[int, list, bytes]] = TTLCache(
+            maxsize=_LOCAL_CACHE_MAXSIZE, ttl=_LOCAL_CACHE_TTL
+        )
+
+    def _pool(self) -> httpx.AsyncBaseTransport:
+        """The connection pool for the running event loop, created on first use."""
+        loop = asyncio.get_running_loop()
+        pool = self._pools.get(loop)
+        if pool is None:
+            pool = (
+                _AiohttpTransport(self._limits)
+                if self._direct
+                else httpx.AsyncHTTPTransport(limits=self._limits)
+            )
+            self._pools[loop] = pool
+        return pool
+
+    async def _forward(self, request: httpx.Request) -> httpx.Response:
+        """Send the (possibly modified) request on to OpenRouter."""
+        return await self._pool().handle_async_request(request)
+
+    async def aclose(self) -> None:
+        """Close the running loop's connection pool.
+
+        Pools opened on other loops can only be closed from their own loop;
+        they are dropped along with their loop.
+        """
+        pool = self._pools.pop(asyncio.get_running_loop(), None)
+        if pool is not None:
+            await pool.aclose()
+
     async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
-        """Intercept and modify OpenRouter chat completion requests."""
+        """Log OpenRouter chat completion requests and apply the local cache."""
         if (
             "/chat/completions" in request.url.path
             and request.method == "POST"
             and request.content
         ):
-            # Parse the JSON request body
-            body = ujson.loads(request.content)
+            # The OpenAI client already merges extra_body (reasoning, models,
+            # caching, local_cache) into the top level of the JSON body, so the
+            # body is sent as-is.
+            raw = request.content
+
+            # Log the request to Logfire. The body is only attached when it's
+            # exported, as the JSON text itself so it isn't decoded and then
+            # re-serialized as attributes.
+            logfire.info(
+                "📝 Sending OpenRouter LLM request",
+                endpoint=str(request.url),
+                request_body=raw.decode() if logfire.enabled else None,
+                operation="llm_request",
+            )
 
-            # Extract OpenRouter parameters from extra_body if present
-            extra_body = body.get("extra_body", {})
+            if b'"local_cache"' in raw:
+                return await self._handle_cached_request(request)
+
+        # Continue with the request
+        return await self._forward(request)
+
+    async def _handle_cached_request(self, request: httpx.Request) -> httpx.Response:
+        """Serve a flagged request from the local response cache.
+
+        The response is fetched and stored on a miss. Only deterministic requests
+        are cached - sampling with temperature > 0 or streaming responses go
+        straight to OpenRouter.
+        """
+        body = orjson.loads(request.content)
+        if not body.pop("local_cache", None):
+            return await self._forward(request)
+
+        # The flag is only meant for this transport, not OpenRouter
+        _set_request_content(request, orjson.dumps(body))
+        if body.get("temperature") != 0 or body.get("stream"):
+            return await self._forward(request)
+
+        key = hashlib.blake2b(
+            str(request.url).encode() + b"\n" + request.content, digest_size=16
+        ).digest()
+        cached = self._response_cache.get(key)
+        if cached is None:
+            response = await self._forward(request)
+            if response.status_code != 200:
+                return response
+
+            # Keep the raw (still encoded) bytes so the headers stay accurate
+            raw = b"".join([chunk async for chunk in response.aiter_raw()])
+            await response.aclose()
+            cached = (response.status_code, response.headers.multi_items(), raw)
+            self._response_cache[key] = cached
+        else:
+            logger.debug("⚡ Served OpenRouter request from local cache")
 
-            if extra_body and isinstance(extra_body, dict):
-                # Extract reasoning and fallback_models parameters
-                openrouter_reasoning = extra_body.pop("reasoning", None)
-                openrouter_fallback_models = extra_body.pop("models", None)
+        status_code, headers, content = cached
+        return httpx.Response(
+            status_code, headers=headers, content=content, request=request
+        )
 
-                # Inject at top level of request body
-                if openrouter_reasoning:
-                    body["reasoning"] = openrouter_reasoning
 
-                if openrouter_fallback_models:
-                    body["models"] = openrouter_fallback_models
+# Connection pool shared by every model talking to OpenRouter through a client
+_HTTP_LIMITS = httpx.Limits(
+    max_connections=100, max_keepalive_connections=50, keepalive_expiry=30.0
+)
 
-                # Clean up extra_body - remove it entirely if now empty
-                if not extra_body:
-                    body.pop("extra_body", None)
-                else:
-                    body["extra_body"] = extra_body
 
-                # Update the request with modified body
-                request._content = ujson.dumps(body).encode()
-                request.content = request._content
-                request.headers["content-length"] = str(len(request._content))
+# Shared OpenRouter HTTP clients, keyed by (timeout, agent name, direct). The
+# key space is fixed by the agents in use, so clients are never evicted (an
+# evicted client could not be closed from here, leaking its connections).
+_HTTP_CLIENTS: dict[tuple[float, str, bool], httpx.AsyncClient] = {}
 
-                logger.debug(
-                    f"🔧 Modified OpenRouter request: reasoning={bool(openrouter_reasoning)}, "
-                    f"fallbacks={len(openrouter_fallback_models) if openrouter_fallback_models else 0}"
-                )
 
-            # Log the request to Logfire
-            logfire.info(
-                "📝 Sending OpenRouter LLM request",
-                endpoint=str(request.url),
-                request_body=body,
-                operation="llm_request",
-            )
+def _get_http_client(
+    timeout: float, agent_name: str, *, direct: bool = False
+) -> httpx.AsyncClient:
+    """Get the shared OpenRouter HTTP client for a timeout and agent name.
+
+    Clients are created once and reused, with the OpenRouter transport installed
+    up front, so repeated model creation doesn't pay for new TLS handshakes.
+    Models must use one of these clients to get request logging and the local
+    response cache.
+    """
+    key = (timeout, agent_name, direct)
+    client = _HTTP_CLIENTS.get(key)
+    if client is None:
+        client = httpx.AsyncClient(
+            timeout=timeout,
+            headers={
+                "HTTP-Referer": "https://100x.ai/",
+                "X-Title": f"100x - {agent_name}",
+            },
+            transport=OpenRouterTransport(limits=_HTTP_LIMITS, direct=direct),
+            http2=False,  # Disable HTTP/2
+        )
+        _HTTP_CLIENTS[key] = client
+    return client
 
-        # Continue with the (possibly modified) request
-        return await super().handle_async_request(request)
+
+async def aclose_http_clients() -> None:
+    """Close every shared client's connections on the running event loop.
+
+    Call this before a loop you started (e.g. with asyncio.run) finishes, so
+    its sockets are released instead of left for garbage collection. The
+    clients stay usable; a later loop opens fresh connections.
+    """
+    # Close the transports rather than the clients: a closed AsyncClient
+    # refuses further requests, but the transport reopens a pool per loop
+    await asyncio.gather(
+        *(client._transport.aclose() for client in _HTTP_CLIENTS.values())
+    )
 
 
 # OpenRouter Settings
-class OpenRouterSettings(BaseModel):
-    """OpenRouter-specific settings for advanced features."""
+_REASONING_EFFORTS = frozenset({None, "low", "medium", "high"})
 
-    model_config = {"extra": "forbid"}
 
-    reasoning_effort: Literal["low", "medium", "high"] | None = Field(
-        default=None, description="Reasoning effort level for compatible models"
-    )
-    include_reasoning_tokens: bool = Field(
-        default=True, description="Include reasoning tokens in the response"
-    )
-    fallback_models: list[str] | None = Field(
-        default=None, description="List of fallback models for routing"
-    )
+@lru_cache(maxsize=128)
+def _build_request_body(
+    reasoning_effort: str | None,
+    include_reasoning_tokens: bool,
+    fallback_models: tuple[str, ...],
+    enable_local_cache: bool = False,
+) -> dict[str, Any]:
+    """Build the OpenRouter request additions for one combination of settings.
 
-    def to_request_body(self) -> dict[str, Any]:
-        """Convert OpenRouter settings to request body format."""
-        request_additions = {}
+    Cached and shared, so it must never be mutated; to_request_body copies it.
+    """
+    request_additions = {}
+
+    # Handle reasoning parameters
+    reasoning_config = {}
+
+    if reasoning_effort:
+        reasoning_config["effort"] = reasoning_effort
+
+    if reasoning_effort or not include_reasoning_tokens:
+        reasoning_config["exclude"] = not include_reasoning_tokens
+
+    if reasoning_config:
+        reasoning_config["enabled"] = True
+        request_additions["reasoning"] = reasoning_config
+
+    # Handle model routing
+    if fallback_models:
+        request_additions["models"] = list(fallback_models)
+
+    # Consumed by OpenRouterTransport and stripped before the request is sent
+    if enable_local_cache:
+        request_additions["local_cache"] = True
+
+    return request_additions
 
-        # Handle reasoning parameters
-        reasoning_config = {}
 
-        if self.reasoning_effort:
-            reasoning_config["effort"] = self.reasoning_effort
+@dataclass(slots=True, frozen=True)
+class OpenRouterSettings:
+    """OpenRouter-specific settings for advanced features.
 
-        if self.reasoning_effort or not self.include_reasoning_tokens:
-            reasoning_config["exclude"] = not self.include_reasoning_tokens
+    Attributes:
+        reasoning_effort: Reasoning effort level for compatible models
+        include_reasoning_tokens: Include reasoning tokens in the response
+        fallback_models: Fallback models for routing, stored as a tuple so
+            settings stay hashable
+        enable_local_cache: Serve identical temperature-0 requests from a local
+            response cache instead of calling OpenRouter again
+    """
 
-        if reasoning_config:
-            reasoning_config["enabled"] = True
-            request_additions["reasoning"] = reasoning_config
+    reasoning_effort: Literal["low", "medium", "high"] | None = None
+    include_reasoning_tokens: bool = True
+    fallback_models: tuple[str, ...] | None = None
+    enable_local_cache: bool = False
 
-        # Handle model routing
-        if self.fallback_models:
-            request_additions["models"] = self.fallback_models
+    def __post_init__(self):
+        """Validate field values and normalize fallback_models to a tuple."""
+        if self.reasoning_effort not in _REASONING_EFFORTS:
+            raise ValueError(
+                f"Invalid reasoning_effort {self.reasoning_effort!r}. "
+                "Must be one of: low, medium, high"
+            )
+        for name in ("include_reasoning_tokens", "enable_local_cache"):
+            value = getattr(self, name)
+            if not isinstance(value, bool):
+                raise TypeError(f"{name} must be a bool, got {type(value).__name__}")
+
+        if self.fallback_models is not None:
+            if isinstance(self.fallback_models, str) or not all(
+                isinstance(model, str) for model in self.fallback_models
+            ):
+                raise TypeError("fallback_models must be a sequence of model names")
+            # Frozen, so assign through object.__setattr__
+            object.__setattr__(self, "fallback_models", tuple(self.fallback_models))
 
-        return request_additions
+    def to_request_body(self) -> dict[str, Any]:
+        """Convert OpenRouter settings to request body format.
+
+        Returns a fresh dict (including the nested reasoning dict and models
+        list) that callers are free to modify.
+        """
+        body = _build_request_body(
+            self.reasoning_effort,
+            self.include_reasoning_tokens,
+            self.fallback_models or (),
+            self.enable_local_cache,
+        )
+        # The cached body is shared between equal settings, so never hand it out
+        return {
+            key: value.copy() if isinstance(value, dict | list) else value
+            for key, value in body.items()
+        }
 
     def to_openrouter_body(self) -> dict[str, Any]:
         """Convert OpenRouter settings to openrouter_body format for HTTP transport."""
@@ -195,109 +547,159 @@ class OpenRouterSettings(BaseModel):
 
 
 # Caching Settings
-class CachingSettings(BaseModel):
-    """Settings for Anthropic prompt caching support."""
+@dataclass(slots=True, frozen=True)
+class CachingSettings:
+    """Settings for Anthropic prompt caching support.
+
+    Attributes:
+        enabled: Enable Anthropic prompt caching
+        cache_system_messages: Cache system messages
+        cache_tools: Cache tool definitions
+        cache_user_messages: Cache user messages
+    """
 
-    model_config = {"extra": "forbid"}
+    enabled: bool = True
+    cache_system_messages: bool = True
+    cache_tools: bool = True
+    cache_user_messages: bool = False
+
+
+# Shared cache breakpoint marker (never mutated)
+_EPHEMERAL = {"type": "ephemeral"}
+
+# Cache breakpoints placed on the most recent messages of each role
+_SYSTEM_CACHE_BREAKPOINTS = 1
+_USER_CACHE_BREAKPOINTS = 2
 
-    enabled: bool = Field(default=True, description="Enable Anthropic prompt caching")
-    cache_system_messages: bool = Field(
-        default=True, description="Cache system messages"
-    )
-    cache_tools: bool = Field(default=True, description="Cache tool definitions")
-    cache_user_messages: bool = Field(default=False, description="Cache user messages")
+
+def _add_cache_control(mapped: dict[str, Any]) -> bool:
+    """Mark a mapped message as an Anthropic cache breakpoint.
+
+    Returns:
+        True if a cache_control marker was added
+    """
+    content = mapped["content"]
+    if isinstance(content, str):
+        # Convert string content to multipart format for cache_control
+        mapped["content"] = [
+            {
+                "type": "text",
+                "text": content,
+                "cache_control": _EPHEMERAL,
+            }
+        ]
+        return True
+
+    if isinstance(content, list):
+        # Add cache_control to the last text block
+        for block in reversed(content):
+            if block["type"] == "text":
+                block["cache_control"] = _EPHEMERAL
+                return True
+
+    return False
 
 
 # Enhanced OpenRouter Model
-@dataclass(init=False)
 class OpenRouterModel(OpenAIChatModel):
-    """Enhanced OpenRouter model with HTTP transport interceptor and caching."""
+    """Enhanced OpenRouter model with caching and OpenRouter response handling.
 
-    def __post_init__(self):
-        """Initialize with custom OpenRouter transport."""
-        super().__post_init__()
+    Requests are routed through OpenRouterTransport by the HTTP client from
+    create_openrouter_model, so the model itself doesn't touch httpx internals.
+    """
 
-        # Replace the HTTP transport with our custom interceptor
-        if hasattr(self.client, "_client") and hasattr(
-            self.client._client, "_transport"
-        ):
-            old_transport = self.client._client._transport
-
-            self.client._client._transport = OpenRouterTransport(
-                verify=old_transport._verify,
-                cert=old_transport._cert,
-                trust_env=old_transport._trust_env,
-                http2=old_transport._http2,
-                limits=old_transport._limits,
-                proxy=old_transport._proxy,
-                socket_options=old_transport._socket_options,
-                uds=old_transport._uds,
-            )
-        else:
-            logger.error(
-                "❌ Failed to install OpenRouter transport - client structure unexpected"
-            )
+    # Hash of the last request's system prefix, for prompt cache diagnostics
+    _cached_prefix_hash: str | None = None
+
+    @cached_property
+    def _caching_settings(self) -> dict[str, Any] | None:
+        """Prompt caching settings, or None if caching is disabled (resolved once)."""
+        caching_settings = (self._settings or {}).get("extra_body", {}).get("caching")
+        if not caching_settings or not caching_settings["enabled"]:
+            return None
+        return caching_settings
 
     async def _map_messages(self, messages: list[Any]) -> list[dict[str, Any]]:
         """Override message mapping to inject Anthropic cache_control."""
         mapped_messages = await super()._map_messages(messages)
 
-        # Check if caching is enabled in settings
-        caching_settings = self._settings.get("extra_body", {}).get("caching")
-        if not caching_settings or not caching_settings["enabled"]:
+        caching_settings = self._caching_settings
+        if not caching_settings:
             return mapped_messages
 
-        # Process each message for caching
-        for mapped in mapped_messages:
-            should_cache = False
-            message_role = mapped["role"]
+        # Anthropic allows at most 4 cache breakpoints per request, and a
+        # breakpoint caches the whole prefix before it. Only the most recent
+        # messages need markers: the last system message and the last two
+        # user messages (so the previous turn's prefix still hits the cache).
+        remaining = {
+            "system": _SYSTEM_CACHE_BREAKPOINTS
+            if caching_settings["cache_system_messages"]
+            else 0,
+            "user": _USER_CACHE_BREAKPOINTS
+            if caching_settings["cache_user_messages"]
+            else 0,
+        }
+        budget = remaining["system"] + remaining["user"]
 
-            if (
-                message_role == "system" and caching_settings["cache_system_messages"]
-            ) or (message_role == "user" and caching_settings["cache_user_messages"]):
-                should_cache = True
-
-            if should_cache:
-                # Convert string content to multipart format for cache_control
-                content = mapped["content"]
-                if isinstance(content, str):
-                    mapped["content"] = [
-                        {
-                            "type": "text",
-                            "text": content,
-                            "cache_control": {"type": "ephemeral"},
-                        }
-                    ]
-                    logger.info(f"💾 Added cache_control to {message_role} message")
-                elif isinstance(content, list) and len(content) > 0:
-                    # Add cache_control to the last text block
-                    for i in range(len(content) - 1, -1, -1):
-                        if content[i]["type"] == "text":
-                            content[i]["cache_control"] = {"type": "ephemeral"}
-                            logger.info(
-                                f"💾 Added cache_control to {message_role} message"
-                            )
-                            break
+        # Walk backwards and stop as soon as every breakpoint has been placed
+        marked = 0
+        for mapped in reversed(mapped_messages):
+            if not budget:
+                break
 
-        return mapped_messages
+            message_role = mapped["role"]
+            if not remaining.get(message_role):
+                continue
 
-    def _map_tool_definition(self, f: Any) -> dict[str, Any]:
-        """Override tool definition mapping to inject Anthropic cache_control."""
-        mapped_tool = super()._map_tool_definition(f)
+            remaining[message_role] -= 1
+            budget -= 1
+            marked += _add_cache_control(mapped)
 
-        # Check if caching is enabled
-        caching_settings = self._settings.get("extra_body", {}).get("caching")
-        if not caching_settings or not caching_settings["enabled"]:
-            return mapped_tool
+        if marked:
+            logger.info(f"💾 Added cache_control to {marked} message(s)")
+
+        self._check_cached_prefix(mapped_messages)
+        return mapped_messages
 
-        # Add cache_control to tool definitions if enabled
-        if caching_settings["cache_tools"]:
-            mapped_tool["cache_control"] = {"type": "ephemeral"}
-            logger.info(
-                f"💾 Added cache_control to tool: {mapped_tool['function']['name']}"
+    def _check_cached_prefix(self, mapped_messages: list[dict[str, Any]]) -> None:
+        """Flag requests whose cached system prefix differs from the last one.
+
+        Prompt caching only pays off while the system prefix stays byte-stable
+        between requests, so a changed hash means the next call pays full price.
+        """
+        system_messages = [m for m in mapped_messages if m["role"] == "system"]
+        if not system_messages:
+            return
+
+        prefix_hash = hashlib.blake2b(
+            orjson.dumps(system_messages, option=orjson.OPT_SORT_KEYS),
+            digest_size=16,
+        ).hexdigest()
+        previous_hash = self._cached_prefix_hash
+        if previous_hash is not None and previous_hash != prefix_hash:
+            logger.debug(
+                f"💾 Cached system prefix changed ({previous_hash[:8]} → "
+                f"{prefix_hash[:8]}) - expect a prompt cache miss"
             )
+        self._cached_prefix_hash = prefix_hash
+
+    def _get_tools(self, model_request_parameters: Any) -> list[dict[str, Any]]:
+        """Override tool mapping to inject Anthropic cache_control."""
+        tools = super()._get_tools(model_request_parameters)
+
+        caching_settings = self._caching_settings
+        if not tools or not caching_settings or not caching_settings["cache_tools"]:
+            return tools
+
+        # Tools are sent ahead of the messages, so a single breakpoint on the
+        # last tool caches the whole catalog
+        tools[-1]["cache_control"] = _EPHEMERAL
+        logger.info(
+            f"💾 Added a cache_control breakpoint to the last of {len(tools)} "
+            "tool definition(s)"
+        )
 
-        return mapped_tool
+        return tools
 
     def _process_response(self, response: chat.ChatCompletion) -> ModelResponse:
         """Set created timestamp if missing and handle OpenRouter-specific responses."""
@@ -311,11 +713,11 @@ class OpenRouterModel(OpenAIChatModel):
             )
 
         # OpenRouter might not set the created field
-        if not hasattr(response, "created") or response.created is None:
-            response.created = int(arrow.now().timestamp())
+        if getattr(response, "created", None) is None:
+            response.created = int(time.time())
 
         # OpenRouter might return None for choices array
-        if not hasattr(response, "choices") or response.choices is None:
+        if getattr(response, "choices", None) is None:
             logger.error("🚨 OpenRouter returned response with no choices")
             raise ModelHTTPError(
                 status_code=502,
@@ -324,24 +726,40 @@ class OpenRouterModel(OpenAIChatModel):
             )
 
         # Check if OpenRouter responded with a different model (fallback occurred)
-        if (
-            hasattr(response, "model")
-            and response.model
-            and response.model != self.model_name
-        ):
+        requested_model = self.model_name
+        received_model = getattr(response, "model", None)
+        if received_model and received_model != requested_model:
             logger.warning(
-                f"⚠️ OpenRouter fallback: requested {self.model_name} → received {response.model}"
+                f"⚠️ OpenRouter fallback: requested {requested_model} → received {received_model}"
             )
             logfire.warning(
                 "OpenRouter model fallback",
-                requested_model=self.model_name,
-                received_model=response.model,
+                requested_model=requested_model,
+                received_model=received_model,
                 operation="model_fallback",
             )
 
         return super()._process_response(response)
 
 
+# Anthropic prompt caching configuration
+_ANTHROPIC_CACHING = asdict(CachingSettings())
+
+# Static extra_body per model: fallback routing, plus caching for Anthropic models.
+# Shared across model instances - treat as read-only.
+_EXTRA_BODY_TEMPLATES = {
+    model_name: (
+        {"models": specs["fallback_models"], "caching": _ANTHROPIC_CACHING}
+        if specs["is_anthropic"]
+        else {"models": specs["fallback_models"]}
+    )
+    for model_name, specs in SUPPORTED_MODELS.items()
+}
+
+# JSON-schema-corrected model profiles, resolved lazily per model name
+_PROFILE_OVERRIDES: dict[str, Any] = {}
+
+
 # Main Functions
 def create_openrouter_model(
     model_name: str,
@@ -349,6 +767,9 @@ def create_openrouter_model(
     agent_name: str = "Agent",
     settings: dict[str, Any] | None = None,
     enable_prompt_caching: bool = True,
+    *,
+    direct: bool = False,
+    enable_local_cache: bool = False,
 ) -> OpenAIChatModel:
     """Create a model configured for OpenRouter with advanced features.
 
@@ -358,6 +779,10 @@ def create_openrouter_model(
         agent_name: Name for OpenRouter tracking headers
         settings: Optional model settings (temperature, etc.)
         enable_prompt_caching: Enable Anthropic prompt caching (Anthropic models only)
+        direct: Send requests over aiohttp instead of httpx's connection pool,
+            which scales better with many concurrent requests
+        enable_local_cache: Serve identical temperature-0 requests from the
+            transport's local response cache instead of calling OpenRouter again
 
     Returns:
         Configured OpenRouter model with all enhancements
@@ -371,8 +796,8 @@ def create_openrouter_model(
         )
 
     # Validate model exists
-    if model_name not in SUPPORTED_MODELS:
-        available = ", ".join(SUPPORTED_MODELS.keys())
+    if model_name not in _SUPPORTED_MODEL_NAMES_SET:
+        available = ", ".join(_SUPPORTED_MODEL_NAMES)
         raise ValueError(
             f"Model '{model_name}' not supported. Available models: {available}"
         )
@@ -381,48 +806,45 @@ def create_openrouter_model(
     model_specs = SUPPORTED_MODELS[model_name]
     fallback_models = model_specs["fallback_models"]
 
-    # Prepare settings with OpenRouter routing
+    # Prepare settings with OpenRouter routing (and caching for Anthropic models)
+    # from the precomputed per-model template. Build a fresh extra_body so the
+    # caller's settings and the shared template are never mutated.
     final_settings = settings.copy() if settings else {}
-
-    # Always ensure extra_body exists
-    if "extra_body" not in final_settings:
-        final_settings["extra_body"] = {}
-
-    # Set up model routing
-    final_settings["extra_body"]["models"] = fallback_models
-
-    # Set up caching configuration - Only for Anthropic models
-    if enable_prompt_caching and model_name.startswith("anthropic/"):
-        final_settings["extra_body"]["caching"] = {
-            "enabled": True,
-            "cache_system_messages": True,
-            "cache_tools": True,
-            "cache_user_messages": False,
-        }
-
-    # Create HTTP client with timeout and headers
-    http_client = httpx.AsyncClient(
-        timeout=timeout,
-        headers={
-            "HTTP-Referer": "https://100x.ai/",
-            "X-Title": f"100x - {agent_name}",
-        },
-        http2=False,  # Disable HTTP/2
-    )
+    extra_body_template = _EXTRA_BODY_TEMPLATES[model_name]
+    if not enable_prompt_caching:
+        extra_body_template = {"models": fallback_models}
+    final_settings["extra_body"] = {
+        **final_settings.get("extra_body", {}),
+        **extra_body_template,
+    }
+    if enable_local_cache:
+        final_settings["extra_body"]["local_cache"] = True
+
+    # Reuse the pooled HTTP client so TLS sessions and keep-alive connections
+    # survive across model creations
+    http_client = _get_http_client(timeout, agent_name, direct=direct)
 
     # Create provider
     provider = OpenRouterProvider(
         api_key=config.openrouter_api_key, http_client=http_client
     )
 
-    # Enable JSON schema output for all models (universal fix)
-    profile_override = None
-    original_profile = provider.model_profile(model_name)
+    # Enable JSON schema output for all models (universal fix).
+    # Profiles depend only on the model name, so resolve once per process.
+    if model_name not in _PROFILE_OVERRIDES:
+        profile_override = None
+        original_profile = provider.model_profile(model_name)
+
+        if original_profile and not original_profile.supports_json_schema_output:
+            corrected_profile = replace(
+                original_profile, supports_json_schema_output=True
+            )
+            profile_override = corrected_profile
+            logger.debug(f"Enabled native JSON schema output for {model_name}")
+
+        _PROFILE_OVERRIDES[model_name] = profile_override
 
-    if original_profile and not original_profile.supports_json_schema_output:
-        corrected_profile = replace(original_profile, supports_json_schema_output=True)
-        profile_override = corrected_profile
-        logger.debug(f"Enabled native JSON schema output for {model_name}")
+    profile_override = _PROFILE_OVERRIDES[model_name]
 
     # Create model with OpenRouter enhancements
     model = OpenRouterModel(
@@ -448,9 +870,12 @@ def create_openrouter_model(
     if reasoning_level:
         log_parts.append(f"reasoning: {reasoning_level}")
 
-    if enable_prompt_caching and model_name.startswith("anthropic/"):
+    if enable_prompt_caching and _IS_ANTHROPIC[model_name]:
         log_parts.append("💾 caching: enabled")
 
+    if enable_local_cache:
+        log_parts.append("⚡ local cache: enabled")
+
     if settings:
         interesting_settings = {k: v for k, v in settings.items() if k != "extra_body"}
         if interesting_settings:
@@ -463,6 +888,41 @@ def create_openrouter_model(
     return model
 
 
+async def run_prompts_concurrent(
+    model: OpenAIChatModel,
+    prompts: Sequence[str],
+    *,
+    max_concurrency: int = 16,
+    settings: dict[str, Any] | None = None,
+) -> list[ModelResponse]:
+    """Send independent single-turn prompts straight to a model concurrently.
+
+    For raw model calls without an agent around them (e.g. bulk scoring).
+    Agents should use BaseAgent.run_batch_async instead.
+
+    Args:
+        model: Model from create_openrouter_model
+        prompts: User prompts, one request each
+        max_concurrency: Maximum number of requests in flight at once
+        settings: Optional per-request model settings
+
+    Returns:
+        Model responses in the same order as prompts
+    """
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency must be at least 1")
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+    parameters = ModelRequestParameters()
+
+    async def request_one(prompt: str) -> ModelResponse:
+        async with semaphore:
+            messages = [ModelRequest(parts=[UserPromptPart(content=prompt)])]
+            return await model.request(messages, settings, parameters)
+
+    return await asyncio.gather(*(request_one(prompt) for prompt in prompts))
+
+
 def get_model_info(model_name: str) -> dict[str, Any]:
     """Get information about a supported model."""
     if model_name not in SUPPORTED_MODELS:
@@ -470,7 +930,14 @@ def get_model_info(model_name: str) -> dict[str, Any]:
     return SUPPORTED_MODELS[model_name]
 
 
-def get_fallback_models(model_name: str) -> list[str]:
+def get_model_pricing(model_name: str) -> ModelPricing:
+    """Get per-token pricing for a supported model."""
+    if model_name not in MODEL_PRICING:
+        raise ValueError(f"Model '{model_name}' not supported")
+    return MODEL_PRICING[model_name]
+
+
+def get_fallback_models(model_name: str) -> tuple[str, ...]:
     """Get fallback models for a given model."""
     model_info = get_model_info(model_name)
     return model_info["fallback_models"]
@@ -480,20 +947,84 @@ def estimate_token_cost(
     model_name: str, input_tokens: int, output_tokens: int
 ) -> float:
     """Estimate the cost of a model invocation."""
-    model_info = get_model_info(model_name)
-    pricing = model_info["pricing"]
+    pricing = get_model_pricing(model_name)
+    return (
+        input_tokens * pricing.input_per_token
+        + output_tokens * pricing.output_per_token
+    )
+
+
+def estimate_token_cost_cached(
+    model_name: str,
+    input_tokens: int,
+    output_tokens: int,
+    *,
+    cache_read_tokens: int = 0,
+    cache_write_tokens: int = 0,
+) -> float:
+    """Estimate the cost of a model invocation, accounting for prompt caching.
+
+    Args:
+        model_name: Full model name
+        input_tokens: Total input tokens, including cache reads and writes
+        output_tokens: Output tokens
+        cache_read_tokens: Input tokens served from the prompt cache
+        cache_write_tokens: Input tokens written to the prompt cache
+
+    Returns:
+        Estimated cost in USD
+    """
+    pricing = get_model_pricing(model_name)
+    uncached_tokens = input_tokens - cache_read_tokens - cache_write_tokens
+    return (
+        uncached_tokens * pricing.input_per_token
+        + cache_read_tokens * pricing.cache_read_per_token
+        + cache_write_tokens * pricing.cache_write_per_token
+        + output_tokens * pricing.output_per_token
+    )
+
+
+def estimate_token_costs_batch(
+    model_names: Sequence[str],
+    input_tokens: Sequence[int],
+    output_tokens: Sequence[int],
+) -> list[float]:
+    """Estimate the cost of many model invocations at once.
+
+    Pricing is resolved once per distinct model rather than once per row, which
+    keeps large cost-accounting passes (e.g. eval sweeps) to a single loop.
+
+    Args:
+        model_names: Full model name per invocation
+        input_tokens: Input tokens per invocation
+        output_tokens: Output tokens per invocation
+
+    Returns:
+        Estimated cost in USD per invocation, in input order
+    """
+    if not len(model_names) == len(input_tokens) == len(output_tokens):
+        raise ValueError("model_names, input_tokens and output_tokens must align")
+
+    pricing = {name: get_model_pricing(name) for name in set(model_names)}
+    return [
+        inputs * pricing[name].input_per_token
+        + outputs * pricing[name].output_per_token
+        for name, inputs, outputs in zip(
+            model_names, input_tokens, output_tokens, strict=True
+        )
+    ]
 
-    input_cost = (input_tokens / 1_000_000) * pricing["input_per_million"]
-    output_cost = (output_tokens / 1_000_000) * pricing["output_per_million"]
 
-    return input_cost + output_cost
+def list_supported_models() -> tuple[str, ...]:
+    """Get all supported model identifiers."""
+    return _SUPPORTED_MODEL_NAMES
 
 
-def list_supported_models() -> list[str]:
-    """Get a list of all supported model identifiers."""
-    return list(SUPPORTED_MODELS.keys())
+def list_vision_models() -> tuple[str, ...]:
+    """Get the supported model identifiers that accept image input."""
+    return _VISION_MODEL_NAMES
 
 
-def get_builtin_models() -> dict[str, Any]:
-    """Get the built-in model registry."""
+def get_builtin_models() -> Mapping[str, dict[str, Any]]:
+    """Get the built-in model registry (read-only)."""
     return SUPPORTED_MODELS
@@ -4,16 +4,34 @@ Provides comprehensive validation of .agent.md files, ensuring they meet
 all requirements for syntax, structure, and schema validity.
 """
 
+from collections import OrderedDict
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-
-from jinja2 import Template, TemplateSyntaxError
-
-from ai.core.agent_config import AgentConfig
+from typing import ClassVar, TextIO
+import asyncio
+import json
+import os
+import re
+import threading
+
+from jinja2 import TemplateSyntaxError
+
+from ai.core.agent_config import (
+    JINJA_ENV,
+    AgentConfig,
+    FileVersion,
+    file_version,
+    is_static_template,
+)
 from helpers.logger import logger
 
+# A line consisting only of the YAML frontmatter delimiter
+_DELIMITER_LINE_RE = re.compile(r"^[ \t\r\f\v]*---[ \t\r\f\v]*$", re.MULTILINE)
 
-@dataclass
+
+@dataclass(slots=True, frozen=True)
 class AgentValidationError:
     """Represents a single validation error with context."""
 
@@ -28,37 +46,106 @@ class AgentValidationError:
         return f"[{self.error_type.upper()}] {line_info}{self.message}"
 
 
+# Validation cache key: (validator class, resolved path, file version)
+_CacheKey = tuple[type, str, FileVersion]
+
+
 class AgentValidator:
     """Main validator that orchestrates all validation layers."""
 
+    # Results for unchanged files, keyed by (validator class, resolved path,
+    # file version) so subclasses with extra checks never see base class results.
+    # Shared by all validators; oldest entries are evicted first.
+    _validation_cache: ClassVar[OrderedDict[_CacheKey, list[AgentValidationError]]] = (
+        OrderedDict()
+    )
+    _VALIDATION_CACHE_SIZE = 4096
+    _validation_cache_lock = threading.Lock()
+
+    @classmethod
+    def clear_validation_cache(cls):
+        """Clear cached validation results."""
+        with cls._validation_cache_lock:
+            cls._validation_cache.clear()
+        logger.debug("🗑️  Agent validation cache cleared")
+
     def validate_file(self, file_path: Path | str) -> list[AgentValidationError]:
         """Validate a single agent file through all validation layers.
 
+        Results are cached until the file's mtime, ctime, inode or size changes.
+        Files modified in the last couple of seconds are never cached, since
+        coarse filesystem timestamps can't yet tell their versions apart.
+
         Args:
             file_path: Path to the .agent.md file to validate
 
         Returns:
             List of validation errors (empty if valid)
         """
-        file_path = Path(file_path)
-        errors = []
+        if not isinstance(file_path, Path):
+            file_path = Path(file_path)
 
         logger.debug(f"🔍 Validating agent file: {file_path}")
 
-        # Check if file exists
-        if not file_path.exists():
-            errors.append(
+        # Check if file exists (one stat serves as both check and cache key)
+        try:
+            stat = file_path.stat()
+        except FileNotFoundError:
+            return [
                 AgentValidationError(
                     line_number=None,
                     message=f"File not found: {file_path}",
                     error_type="structure",
                 )
-            )
-            return errors
+            ]
+
+        cache_key = self._cache_key(file_path, stat)
+        if cache_key is None:
+            return self._validate_file_uncached(file_path, stat)
+
+        cached = self._get_cached(cache_key)
+        if cached is not None:
+            logger.debug(f"Using cached validation result for {file_path}")
+            return list(cached)
+
+        errors = self._validate_file_uncached(file_path, stat)
+        self._store_cached(cache_key, errors)
+
+        return list(errors)
+
+    def _cache_key(self, file_path: Path, stat: os.stat_result) -> _CacheKey | None:
+        """Cache key for this version of a file and validator (None: don't cache)."""
+        version = file_version(stat)
+        if version is None:
+            return None
+        return (type(self), str(file_path.resolve()), version)
+
+    @classmethod
+    def _get_cached(cls, cache_key: _CacheKey) -> list[AgentValidationError] | None:
+        """Look up a cached result, marking it as recently used."""
+        with cls._validation_cache_lock:
+            cached = cls._validation_cache.get(cache_key)
+            if cached is not None:
+                cls._validation_cache.move_to_end(cache_key)
+        return cached
+
+    @classmethod
+    def _store_cached(cls, cache_key: _CacheKey, errors: list[AgentValidationError]):
+        """Cache a result, evicting the least recently used one when full."""
+        with cls._validation_cache_lock:
+            cls._validation_cache[cache_key] = errors
+            if len(cls._validation_cache) > cls._VALIDATION_CACHE_SIZE:
+                cls._validation_cache.popitem(last=False)
+
+    def _validate_file_uncached(
+        self, file_path: Path, stat: os.stat_result
+    ) -> list[AgentValidationError]:
+        """Run every validation layer on an existing, already stat'ed agent file."""
+        errors = []
 
-        # Parse the agent config
+        # Parse the agent config (reusing our stat instead of taking another)
         try:
-            config = AgentConfig.from_file(file_path)
+            config = AgentConfig.from_file(file_path, stat=stat)
         except (FileNotFoundError, ValueError, TypeError) as e:
             errors.append(
                 AgentValidationError(
@@ -70,7 +157,7 @@ class AgentValidator:
             return errors  # Can't continue without valid parsing
 
         # Run all validation layers
-        errors.extend(self._validate_yaml_structure(file_path))
+        errors.extend(self._validate_yaml_structure(config.source_text))
         errors.extend(self._validate_config_schema(config))
         errors.extend(self._validate_jinja2_templates(config))
         errors.extend(self._validate_output_schema(config))
@@ -97,7 +184,7 @@ class AgentValidator:
         results = {}
 
         # Find all .agent.md files recursively
-        agent_files = list(dir_path.rglob("*.agent.md"))
+        agent_files = list(self._iter_agent_files(dir_path))
 
         if not agent_files:
             logger.warning(f"⚠️ No .agent.md files found in {dir_path}")
@@ -105,29 +192,93 @@ class AgentValidator:
 
         logger.info(f"🔍 Validating {len(agent_files)} agent files in {dir_path}")
 
-        for agent_file in agent_files:
-            relative_path = agent_file.relative_to(dir_path)
-            errors = self.validate_file(agent_file)
-            results[str(relative_path)] = errors
+        # Validation is dominated by file I/O and parsing, so validate files in
+        # parallel; map keeps results in discovery order
+        max_workers = min(32, (os.cpu_count() or 1) * 4, len(agent_files))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            all_errors = list(executor.map(self.validate_file, agent_files))
+
+        for agent_file, errors in zip(agent_files, all_errors, strict=True):
+            results[os.path.relpath(agent_file, dir_path)] = errors
+
+        self._log_directory_summary(results)
+        return results
+
+    async def validate_directory_async(
+        self, dir_path: Path | str, *, max_concurrency: int = 64
+    ) -> dict[str, list[AgentValidationError]]:
+        """Validate all .agent.md files in a directory from async code.
+
+        Files are validated in worker threads with at most max_concurrency in
+        flight, so reads overlap without blocking the event loop.
+
+        Args:
+            dir_path: Path to directory to search
+            max_concurrency: Maximum number of files validated at once
+
+        Returns:
+            Dictionary mapping file paths to their validation errors
+        """
+        dir_path = Path(dir_path)
 
-        # Summary
+        # Walk in a thread too - large trees mean many directory reads
+        agent_files = await asyncio.to_thread(
+            lambda: list(self._iter_agent_files(dir_path))
+        )
+
+        if not agent_files:
+            logger.warning(f"⚠️ No .agent.md files found in {dir_path}")
+            return {}
+
+        logger.info(f"🔍 Validating {len(agent_files)} agent files in {dir_path}")
+
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def validate(agent_file: str) -> list[AgentValidationError]:
+            async with semaphore:
+                return await asyncio.to_thread(self.validate_file, agent_file)
+
+        # gather preserves input order, so results stay in discovery order
+        all_errors = await asyncio.gather(*(validate(f) for f in agent_files))
+        results = {
+            os.path.relpath(agent_file, dir_path): errors
+            for agent_file, errors in zip(agent_files, all_errors, strict=True)
+        }
+
+        self._log_directory_summary(results)
+        return results
+
+    @staticmethod
+    def _log_directory_summary(results: dict[str, list[AgentValidationError]]):
+        """Log the file and error totals for a directory validation run."""
         total_errors = sum(len(errors) for errors in results.values())
         valid_files = len([errors for errors in results.values() if not errors])
 
         logger.info(
-            f"📊 Validation complete: {valid_files}/{len(agent_files)} files valid, "
+            f"📊 Validation complete: {valid_files}/{len(results)} files valid, "
             f"{total_errors} total errors"
         )
 
-        return results
+    @classmethod
+    def _iter_agent_files(cls, root: Path | str) -> Iterator[str]:
+        """Yield paths of .agent.md files under root, recursively.
 
-    def _validate_yaml_structure(self, file_path: Path) -> list[AgentValidationError]:
-        """Validate YAML frontmatter structure."""
+        Uses os.scandir so file/directory checks come from the cached directory
+        entries instead of a stat() per path. Symlinked directories aren't
+        followed, matching Path.rglob.
+        """
+        with os.scandir(root) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    yield from cls._iter_agent_files(entry.path)
+                elif entry.name.endswith(".agent.md") and entry.is_file():
+                    yield entry.path
+
+    def _validate_yaml_structure(self, content: str) -> list[AgentValidationError]:
+        """Validate YAML frontmatter structure of the raw file content."""
         errors = []
 
         try:
-            content = file_path.read_text()
-
             # Check for proper YAML frontmatter structure
             if not content.startswith("---\n"):
                 errors.append(
@@ -139,15 +290,9 @@ class AgentValidator:
                 )
                 return errors
 
-            # Find all occurrences of ---
-            lines = content.split("\n")
-            yaml_delimiters = []
-
-            for i, line in enumerate(lines):
-                if line.strip() == "---":
-                    yaml_delimiters.append(i + 1)  # 1-based line numbers
-
-            if len(yaml_delimiters) < 2:
+            # Find the closing --- with one scan instead of splitting into lines
+            closing = _DELIMITER_LINE_RE.search(content, 4)
+            if closing is None:
                 errors.append(
                     AgentValidationError(
                         line_number=None,
@@ -157,9 +302,9 @@ class AgentValidator:
                 )
                 return errors
 
-            # Check if there's content between the delimiters
-            yaml_start = yaml_delimiters[0]
-            yaml_end = yaml_delimiters[1]
+            # Check if there's content between the delimiters (1-based lines)
+            yaml_start = 1
+            yaml_end = content.count("\n", 0, closing.start()) + 1
 
             if yaml_end <= yaml_start + 1:
                 errors.append(
@@ -228,9 +373,14 @@ class AgentValidator:
         """Validate a single Jinja2 template."""
         errors = []
 
+        # Plain text without template markers always parses
+        if is_static_template(template_content):
+            return errors
+
         try:
-            # Try to parse the template - this will catch syntax errors
-            Template(template_content)
+            # Generate (but don't byte-compile) the template code - this catches
+            # syntax errors plus compile-time ones like unknown filters
+            JINJA_ENV.compile(template_content, raw=True)
 
         except TemplateSyntaxError as e:
             # Extract line number if available
@@ -280,23 +430,24 @@ class AgentValidator:
 
 
 def format_validation_results(
-    results: dict[str, list[AgentValidationError]], output_format: str = "human"
-) -> str:
+    results: dict[str, list[AgentValidationError]],
+    output_format: str = "human",
+    *,
+    out: TextIO | None = None,
+) -> str | None:
     """Format validation results for display.
 
     Args:
         results: Dictionary mapping file paths to validation errors
         output_format: Format for output ("human", "json", "github")
+        out: Stream to write to instead of building a string
 
     Returns:
-        Formatted string representation
+        Formatted string representation, or None when written to out
     """
     if output_format == "json":
-        import json
-
-        json_results = {}
-        for file_path, errors in results.items():
-            json_results[file_path] = [
+        json_results = {
+            file_path: [
                 {
                     "line_number": error.line_number,
                     "message": error.message,
@@ -305,45 +456,61 @@ def format_validation_results(
                 }
                 for error in errors
             ]
-        return json.dumps(json_results, indent=2)
+            for file_path, errors in results.items()
+        }
+        if out is None:
+            return json.dumps(json_results, indent=2)
+        json.dump(json_results, out, indent=2)
+        out.write("\n")
+        return None
 
     if output_format == "github":
-        # GitHub Actions format
-        lines = []
-        for file_path, errors in results.items():
-            for error in errors:
-                level = "error" if error.severity == "error" else "warning"
-                line_info = f",line={error.line_number}" if error.line_number else ""
-                lines.append(f"::{level} file={file_path}{line_info}::{error.message}")
+        lines = _iter_github_lines(results)
+    else:
+        lines = _iter_human_lines(results)
+
+    if out is None:
         return "\n".join(lines)
+    for line in lines:
+        out.write(line)
+        out.write("\n")
+    return None
+
 
-    # Human-readable format
-    lines = []
+def _iter_github_lines(results: dict[str, list[AgentValidationError]]) -> Iterator[str]:
+    """Yield GitHub Actions annotation lines."""
+    for file_path, errors in results.items():
+        for error in errors:
+            level = "error" if error.severity == "error" else "warning"
+            line_info = f",line={error.line_number}" if error.line_number else ""
+            yield f"::{level} file={file_path}{line_info}::{error.message}"
+
+
+def _iter_human_lines(results: dict[str, list[AgentValidationError]]) -> Iterator[str]:
+    """Yield human-readable report lines, ending with a summary."""
     total_errors = 0
     total_warnings = 0
+    valid_files = 0
 
     for file_path, errors in results.items():
-        if errors:
-            lines.append(f"\n📄 {file_path}:")
-            for error in errors:
-                icon = "❌" if error.severity == "error" else "⚠️"
-                lines.append(f"  {icon} {error}")
-                if error.severity == "error":
-                    total_errors += 1
-                else:
-                    total_warnings += 1
-        else:
-            lines.append(f"\n✅ {file_path}: Valid")
+        if not errors:
+            valid_files += 1
+            yield f"\n✅ {file_path}: Valid"
+            continue
+
+        yield f"\n📄 {file_path}:"
+        for error in errors:
+            if error.severity == "error":
+                total_errors += 1
+                yield f"  ❌ {error}"
+            else:
+                total_warnings += 1
+                yield f"  ⚠️ {error}"
 
     # Summary
-    total_files = len(results)
-    valid_files = len([errors for errors in results.values() if not errors])
-
-    lines.append("\n📊 Summary:")
-    lines.append(f"  Files: {valid_files}/{total_files} valid")
+    yield "\n📊 Summary:"
+    yield f"  Files: {valid_files}/{len(results)} valid"
     if total_errors:
-        lines.append(f"  Errors: {total_errors}")
+        yield f"  Errors: {total_errors}"
     if total_warnings:
-        lines.append(f"  Warnings: {total_warnings}")
-
-    return "\n".join(lines)
+        yield f"  Warnings: {total_warnings}"
@@ -0,0 +1,17 @@
+"""Shared fixtures for ai tests."""
+
+import pytest
+
+from ai.core.agent_config import AgentConfig
+
+
+@pytest.fixture(scope="session")
+def patrick_config() -> AgentConfig:
+    """Patrick's parsed config, loaded once per test session (treat as read-only)."""
+    return AgentConfig.from_file("ai/agents/patrick.agent.md")
+
+
+@pytest.fixture(scope="session")
+def simple_test_config() -> AgentConfig:
+    """The simple test fixture's parsed config, loaded once per test session."""
+    return AgentConfig.from_file("ai/tests/fixtures/simple_test.agent.md")
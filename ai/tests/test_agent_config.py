@@ -1,61 +1,75 @@
 """Tests for agent configuration parsing."""
 
-from ai.core.agent_config import AgentConfig
+from pathlib import Path
+import os
+
+from ai.core.agent_config import AgentConfig, _validate_config_inputs
 
 
 class TestAgentConfig:
     """Test suite for AgentConfig."""
 
-    def test_load_from_file(self):
+    def test_load_from_file(self, patrick_config):
         """Test loading agent from .agent.md file."""
-        config = AgentConfig.from_file("ai/agents/patrick.agent.md")
-
-        assert config.name == "Patrick"
-        assert config.description
-        assert config.model_name == "anthropic/claude-sonnet-4.5"
-        assert config.temperature == 0.9
+        assert patrick_config.name == "Patrick"
+        assert patrick_config.description
+        assert patrick_config.model_name == "anthropic/claude-sonnet-4.5"
+        assert patrick_config.temperature == 0.9
 
-    def test_parse_sections(self):
+    def test_parse_sections(self, patrick_config):
         """Test that HTML comment sections are parsed correctly."""
-        config = AgentConfig.from_file("ai/agents/patrick.agent.md")
-
-        assert config.system_prompt
-        assert config.user_prompt
-        assert config.output_schema_code
-        assert "{{ query }}" in config.user_prompt
+        assert patrick_config.system_prompt
+        assert patrick_config.user_prompt
+        assert patrick_config.output_schema_code
+        assert "{{ query }}" in patrick_config.user_prompt
 
-    def test_render_system_prompt(self):
+    def test_render_system_prompt(self, simple_test_config):
         """Test system prompt rendering with context."""
-        config = AgentConfig.from_file("ai/tests/fixtures/simple_test.agent.md")
-
-        rendered = config.render_system_prompt({"test_var": "test_value"})
+        rendered = simple_test_config.render_system_prompt({"test_var": "test_value"})
 
         assert "test agent" in rendered.lower()
         assert rendered.strip()
 
-    def test_render_user_prompt(self):
+    def test_render_user_prompt(self, simple_test_config):
         """Test user prompt rendering with context."""
-        config = AgentConfig.from_file("ai/tests/fixtures/simple_test.agent.md")
-
-        rendered = config.render_user_prompt({"query": "Hello world"})
+        rendered = simple_test_config.render_user_prompt({"query": "Hello world"})
 
         assert "Hello world" in rendered
 
-    def test_get_output_model(self):
+    def test_get_output_model(self, simple_test_config):
         """Test extracting Pydantic model from output schema."""
-        config = AgentConfig.from_file("ai/tests/fixtures/simple_test.agent.md")
-
-        output_model = config.get_output_model()
+        output_model = simple_test_config.get_output_model()
 
         # Should be able to instantiate it
         output = output_model(result="test")
         assert output.result == "test"
 
-    def test_validate_valid_agent(self):
-        """Test validation of a valid agent file."""
-        config = AgentConfig.from_file("ai/agents/patrick.agent.md")
+    def test_get_output_model_is_memoized(self, simple_test_config):
+        """Test that the output schema is only executed once per config."""
+        assert (
+            simple_test_config.get_output_model()
+            is simple_test_config.get_output_model()
+        )
 
-        errors = config.validate()
+    def test_output_model_shared_across_configs_with_same_schema(self, tmp_path):
+        """Test that an unchanged schema isn't re-executed when a file is re-parsed."""
+        agent_file = tmp_path / "copy.agent.md"
+        agent_file.write_text(
+            Path("ai/tests/fixtures/simple_test.agent.md").read_text()
+        )
+        first = AgentConfig.from_file(agent_file)
+
+        agent_file.write_text(agent_file.read_text() + "\nTrailing notes\n")
+        stat = agent_file.stat()
+        os.utime(agent_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        second = AgentConfig.from_file(agent_file)
+
+        assert first is not second
+        assert first.get_output_model() is second.get_output_model()
+
+    def test_validate_valid_agent(self, patrick_config):
+        """Test validation of a valid agent file."""
+        errors = patrick_config.validate()
 
         assert errors == []
 
@@ -86,14 +100,52 @@ Test
         assert len(errors) > 0
         assert any("description" in e.lower() for e in errors)
 
-    def test_explain(self):
-        """Test explain method returns readable description."""
-        config = AgentConfig.from_file("ai/agents/patrick.agent.md")
+    def test_validate_caches_results_for_same_content(self, patrick_config):
+        """Test that validate returns fresh lists served from the shared cache."""
+        patrick_config.validate()
+        hits = _validate_config_inputs.cache_info().hits
+
+        errors = patrick_config.validate()
+        errors.append("caller mutation")
+
+        assert _validate_config_inputs.cache_info().hits == hits + 1
+        assert patrick_config.validate() == []
+
+    def test_validate_handles_unhashable_values(self):
+        """Test that unhashable frontmatter values are validated without caching."""
+        config = AgentConfig(config={"name": "X", "temperature": [1]})
 
-        explanation = config.explain()
+        assert "Temperature must be a number between 0 and 2" in config.validate()
+
+    def test_explain(self, patrick_config):
+        """Test explain method returns readable description."""
+        explanation = patrick_config.explain()
 
         assert "Patrick" in explanation
-        assert config.description in explanation
+        assert patrick_config.description in explanation
+
+    def test_latest_version_skips_malformed_history(self):
+        """Test that non-mapping entries and bad versions don't break lookups."""
+        config = AgentConfig(
+            config={
+                "evolution_history": [
+                    "v1 note",
+                    {"version": "3"},
+                    {"version": "later"},
+                    {"version": 2},
+                ]
+            }
+        )
+
+        assert config.latest_version == 3
+        assert AgentConfig(config={"evolution_history": "v2"}).latest_version == 1
+
+    def test_settings_follow_config_changes(self):
+        """Test that settings read from the current frontmatter config."""
+        config = AgentConfig(config={"name": "Before"})
+        config.config["name"] = "After"
+
+        assert config.name == "After"
 
     def test_cache_clearing(self):
         """Test that cache can be cleared."""
@@ -106,3 +158,57 @@ Test
         # Should still work
         config = AgentConfig.from_file("ai/agents/patrick.agent.md")
         assert config.name == "Patrick"
+
+    def test_equivalent_paths_share_cache_entry(self):
+        """Test that different spellings of one path hit the same cache entry."""
+        AgentConfig.clear_cache()
+
+        first = AgentConfig.from_file("ai/agents/patrick.agent.md")
+        second = AgentConfig.from_file("./ai/agents/../agents/patrick.agent.md")
+
+        assert first is second
+
+    def test_modified_file_is_reparsed(self, tmp_path):
+        """Test that editing an agent file invalidates its cached config."""
+        agent_file = tmp_path / "editable.agent.md"
+        agent_file.write_text("---\nname: Before\n---\n\nBody\n")
+
+        assert AgentConfig.from_file(agent_file).name == "Before"
+
+        agent_file.write_text("---\nname: After\n---\n\nBody\n")
+        stat = agent_file.stat()
+        os.utime(agent_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+        assert AgentConfig.from_file(agent_file).name == "After"
+
+    def test_known_stat_skips_stat(self, mocker):
+        """Test that a caller-supplied stat shares the cache entry without a stat."""
+        path = Path("ai/agents/patrick.agent.md")
+        expected = AgentConfig.from_file(path)
+        stat = mocker.spy(Path, "stat")
+
+        config = AgentConfig.from_file(path, stat=path.stat())
+
+        assert config is expected
+        assert stat.call_count == 1  # Only the one made by this test
+
+    def test_recently_modified_file_is_not_cached(self, tmp_path):
+        """Test that a file edited moments ago is re-parsed on every load."""
+        agent_file = tmp_path / "fresh.agent.md"
+        agent_file.write_text("---\nname: Fresh\n---\n\nBody\n")
+
+        first = AgentConfig.from_file(agent_file)
+        second = AgentConfig.from_file(agent_file)
+
+        assert first is not second
+        assert first.name == second.name == "Fresh"
+
+    def test_non_standard_frontmatter_falls_back(self, tmp_path):
+        """Test that unusual frontmatter layouts still parse correctly."""
+        agent_file = tmp_path / "spaced.agent.md"
+        agent_file.write_text("\n---   \nname: Spaced\n---\n\nBody text\n")
+
+        config = AgentConfig.from_file(agent_file)
+
+        assert config.name == "Spaced"
+        assert config.raw_content == "Body text"
@@ -1,31 +1,42 @@
 """Tests for BaseAgent using Pydantic AI TestModel."""
 
+from pathlib import Path
+import asyncio
+
+from jinja2 import Template
 from pydantic_ai.models.test import TestModel
 import pytest
 
-from ai.agents.base_agent import BaseAgent
+from ai.agents.base_agent import (
+    BaseAgent,
+    _MissingAsEmpty,
+    _resolve_agent_file,
+    _to_format_string,
+)
 from ai.core.config import config
 
 
+@pytest.fixture
+def mock_openrouter(mocker):
+    """Mock OpenRouter model creation to avoid needing an API key."""
+    return mocker.patch("ai.agents.base_agent.create_openrouter_model")
+
+
 class TestBaseAgent:
     """Test suite for BaseAgent."""
 
-    def test_init_agent(self, mocker):
+    @pytest.mark.usefixtures("mock_openrouter")
+    def test_init_agent(self):
         """Test agent initialization."""
-        # Mock OpenRouter to avoid needing API key
-        mocker.patch("ai.agents.base_agent.create_openrouter_model")
-
         agent = BaseAgent("ai/tests/fixtures/simple_test.agent.md")
 
         assert agent.config.name == "Simple Test Agent"
         assert agent.model_name == "anthropic/claude-sonnet-4.5"
         assert agent.temperature == 0.5
 
-    def test_explain(self, mocker):
+    @pytest.mark.usefixtures("mock_openrouter")
+    def test_explain(self):
         """Test explain method."""
-        # Mock OpenRouter to avoid needing API key
-        mocker.patch("ai.agents.base_agent.create_openrouter_model")
-
         agent = BaseAgent("ai/tests/fixtures/simple_test.agent.md")
 
         explanation = agent.explain()
@@ -73,11 +84,89 @@ class TestBaseAgent:
         assert "model" in usage
         assert "total_cost" in usage
 
-    def test_model_override(self, mocker):
-        """Test model override parameter."""
-        # Mock OpenRouter to avoid needing API key
-        mocker.patch("ai.agents.base_agent.create_openrouter_model")
+    @pytest.mark.usefixtures("mock_openrouter")
+    def test_query_cost_accounting(self):
+        """Test that query cost is computed from the model's pricing."""
+        agent = BaseAgent("ai/tests/fixtures/simple_test.agent.md")
+
+        with agent.agent.override(model=TestModel()):
+            agent.query(user_context={"query": "Test"})
+
+        # Sonnet 4.5 pricing: $3/M input, $15/M output
+        expected = (
+            agent.total_input_tokens * 3.0 + agent.total_output_tokens * 15.0
+        ) / 1_000_000
+        usage = agent.get_usage_summary()
+        assert usage["query_count"] == 1
+        assert usage["total_cost"] == pytest.approx(expected, abs=1e-6)
+        assert float(agent.total_cost) == pytest.approx(expected, abs=1e-6)
+
+    @pytest.mark.parametrize("observe", [True, False])
+    @pytest.mark.usefixtures("mock_openrouter")
+    def test_cost_attributes_only_when_observed(self, mocker, observe):
+        """Test that span cost attributes are skipped when telemetry is off."""
+        agent = BaseAgent("ai/tests/fixtures/simple_test.agent.md")
+        agent._observe = observe
+        record_cost = mocker.spy(agent, "_record_cost")
+
+        with agent.agent.override(model=TestModel()):
+            agent.query(user_context={"query": "Test"})
+
+        assert record_cost.called is observe
+        assert agent.total_input_tokens > 0
+
+    @pytest.mark.usefixtures("mock_openrouter")
+    def test_run_batch(self):
+        """Test running several prompts concurrently in one batch."""
+        agent = BaseAgent("ai/tests/fixtures/simple_test.agent.md")
+
+        with agent.agent.override(model=TestModel()):
+            results = agent.run_batch(["one", "two", "three"], max_concurrency=2)
 
+        assert len(results) == 3
+        assert all(isinstance(result.result, str) for result in results)
+        assert agent.query_count == 3
+        assert agent.total_input_tokens > 0
+
+    @pytest.mark.usefixtures("mock_openrouter")
+    def test_run_batch_closes_its_loops_pools(self, mocker):
+        """Test that each run_batch call closes the pools opened on its loop."""
+        aclose = mocker.patch("ai.agents.base_agent.aclose_http_clients")
+        agent = BaseAgent("ai/tests/fixtures/simple_test.agent.md")
+
+        with agent.agent.override(model=TestModel()):
+            agent.run_batch(["one"])
+            agent.run_batch(["two"])
+
+        assert aclose.await_count == 2
+        assert agent.query_count == 2
+
+    @pytest.mark.usefixtures("mock_openrouter")
+    def test_run_batch_inside_running_loop(self):
+        """Test that run_batch points async callers at run_batch_async."""
+        agent = BaseAgent("ai/tests/fixtures/simple_test.agent.md")
+
+        async def call_sync_wrapper():
+            agent.run_batch(["one"])
+
+        with pytest.raises(RuntimeError, match="await run_batch_async"):
+            asyncio.run(call_sync_wrapper())
+
+        assert agent.query_count == 0
+
+    @pytest.mark.usefixtures("mock_openrouter")
+    def test_run_batch_rejects_empty_prompt(self):
+        """Test that a batch with an empty prompt fails before any LLM call."""
+        agent = BaseAgent("ai/tests/fixtures/simple_test.agent.md")
+
+        with pytest.raises(ValueError, match="No user prompt"):
+            agent.run_batch(["one", ""])
+
+        assert agent.query_count == 0
+
+    @pytest.mark.usefixtures("mock_openrouter")
+    def test_model_override(self):
+        """Test model override parameter."""
         agent = BaseAgent(
             "ai/tests/fixtures/simple_test.agent.md",
             model_override="anthropic/claude-3.5-haiku",
@@ -85,11 +174,9 @@ class TestBaseAgent:
 
         assert agent.model_name == "anthropic/claude-3.5-haiku"
 
-    def test_temperature_override(self, mocker):
+    @pytest.mark.usefixtures("mock_openrouter")
+    def test_temperature_override(self):
         """Test temperature override parameter."""
-        # Mock OpenRouter to avoid needing API key
-        mocker.patch("ai.agents.base_agent.create_openrouter_model")
-
         agent = BaseAgent(
             "ai/tests/fixtures/simple_test.agent.md",
             temperature_override=0.8,
@@ -97,11 +184,9 @@ class TestBaseAgent:
 
         assert agent.temperature == 0.8
 
-    def test_temperature_zero_override(self, mocker):
+    @pytest.mark.usefixtures("mock_openrouter")
+    def test_temperature_zero_override(self):
         """Test that temperature=0.0 override is honored (not treated as falsy)."""
-        # Mock OpenRouter to avoid needing API key
-        mocker.patch("ai.agents.base_agent.create_openrouter_model")
-
         agent = BaseAgent(
             "ai/tests/fixtures/simple_test.agent.md",
             temperature_override=0.0,
@@ -110,11 +195,78 @@ class TestBaseAgent:
         # Zero should be honored, not fall back to config value (0.5)
         assert agent.temperature == 0.0
 
+    @pytest.mark.usefixtures("mock_openrouter")
+    def test_render_user_prompt_uses_compiled_template(self, tmp_path, mocker):
+        """Test that prompt templates are compiled once and reused per render."""
+        agent_file = tmp_path / "jinja_test.agent.md"
+        agent_file.write_text(
+            Path("ai/tests/fixtures/simple_test.agent.md")
+            .read_text()
+            .replace(
+                "Query: {{ query }}",
+                "{% if query %}Query: {{ query }}{% else %}No query{% endif %}",
+            )
+        )
+        agent = BaseAgent(agent_file)
+        assert agent._user_format is None  # Needs Jinja2, no format_map fast path
+        from_string = mocker.spy(agent.jinja_env, "from_string")
+        get_template = mocker.spy(agent.jinja_env, "get_template")
+        render = mocker.spy(agent._user_template, "render")
+
+        first = agent._render_user_prompt({"query": "one"})
+        second = agent._render_user_prompt({})
+
+        assert first == "Query: one"
+        assert second == "No query"
+        assert render.call_count == 2
+        from_string.assert_not_called()
+        get_template.assert_not_called()
+
+    @pytest.mark.usefixtures("mock_openrouter")
+    def test_render_does_not_mutate_context(self):
+        """Test that rendering prompts leaves the caller's context untouched."""
+        agent = BaseAgent("ai/tests/fixtures/simple_test.agent.md")
+        context = {"query": "Hello"}
+
+        agent._render_system_prompt(context)
+        agent._render_user_prompt(context)
+
+        assert context == {"query": "Hello"}
+
+    @pytest.mark.usefixtures("mock_openrouter")
+    def test_agents_share_jinja_environment(self):
+        """Test that agents share one Jinja2 environment and compiled templates."""
+        first = BaseAgent("ai/tests/fixtures/simple_test.agent.md")
+        second = BaseAgent("ai/tests/fixtures/simple_test.agent.md")
+
+        assert first.jinja_env is second.jinja_env
+        assert first._user_template is second._user_template
+
     def test_agent_not_found(self):
         """Test that missing agent file raises error."""
         with pytest.raises(FileNotFoundError):
             BaseAgent("nonexistent.agent.md")
 
+    def test_agent_file_lookup_follows_cwd_and_removals(self, tmp_path, monkeypatch):
+        """Test that agent file lookups are redone for each cwd and file state."""
+        first, second = tmp_path / "first", tmp_path / "second"
+        first.mkdir()
+        (second / "ai" / "agents").mkdir(parents=True)
+        (first / "x.agent.md").write_text("first")
+        (second / "ai" / "agents" / "x.agent.md").write_text("second")
+
+        monkeypatch.chdir(first)
+        assert _resolve_agent_file(Path("x"))[0] == Path("x.agent.md")
+
+        monkeypatch.chdir(second)
+        assert _resolve_agent_file(Path("x"))[0] == Path("ai/agents/x.agent.md")
+
+        # A removed file falls through to the next candidate
+        (second / "x.agent.md").write_text("given")
+        assert _resolve_agent_file(Path("x"))[0] == Path("x.agent.md")
+        (second / "x.agent.md").unlink()
+        assert _resolve_agent_file(Path("x"))[0] == Path("ai/agents/x.agent.md")
+
     def test_query_requires_input(self):
         """Test that query requires either message or context."""
         if not config.openrouter_api_key:
@@ -125,11 +277,9 @@ class TestBaseAgent:
         with pytest.raises(ValueError, match="Must provide"):
             agent.query()
 
-    def test_repr(self, mocker):
+    @pytest.mark.usefixtures("mock_openrouter")
+    def test_repr(self):
         """Test string representation."""
-        # Mock OpenRouter to avoid needing API key
-        mocker.patch("ai.agents.base_agent.create_openrouter_model")
-
         agent = BaseAgent("ai/tests/fixtures/simple_test.agent.md")
 
         repr_str = repr(agent)
@@ -137,3 +287,40 @@ class TestBaseAgent:
         assert "BaseAgent" in repr_str
         assert "Simple Test Agent" in repr_str
         assert agent.model_name in repr_str
+
+
+class TestSimpleTemplateFastPath:
+    """Test suite for the str.format_map fast path for simple prompts."""
+
+    @pytest.mark.parametrize(
+        "source",
+        [
+            "Query: {{ query }}",
+            "{{query}} and {{ missing }}",
+            'Reply as JSON like {"answer": "{{ query }}"}',
+        ],
+    )
+    def test_matches_jinja_output(self, source):
+        """Test that simple templates render exactly like Jinja2."""
+        format_string = _to_format_string(source)
+        context = {"query": "Why {braces}?"}
+
+        assert format_string is not None
+        assert format_string.format_map(_MissingAsEmpty(context)) == Template(
+            source
+        ).render(context)
+
+    @pytest.mark.parametrize(
+        "source",
+        [
+            "{% if query %}{{ query }}{% endif %}",
+            "{{ query | upper }}",
+            "{# comment #}{{ query }}",
+            "{{- query }}",
+            "{{ user.name }}",
+            "{{ none }}",
+        ],
+    )
+    def test_complex_templates_use_jinja(self, source):
+        """Test that anything beyond bare substitution falls back to Jinja2."""
+        assert _to_format_string(source) is None
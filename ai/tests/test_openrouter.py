@@ -1,23 +1,46 @@
 """Tests for OpenRouter model creation and configuration."""
 
+from collections.abc import Mapping
+from dataclasses import FrozenInstanceError, asdict
+from types import SimpleNamespace
 from unittest.mock import MagicMock
+import asyncio
 
+from pydantic_ai.exceptions import ModelHTTPError
+import httpx
+import orjson
 import pytest
 
 from ai.core.config import config
 from ai.core.openrouter import (
     SUPPORTED_MODELS,
     CachingSettings,
+    OpenRouterModel,
     OpenRouterSettings,
+    OpenRouterTransport,
+    _get_http_client,
+    aclose_http_clients,
     create_openrouter_model,
     estimate_token_cost,
+    estimate_token_cost_cached,
+    estimate_token_costs_batch,
     get_builtin_models,
     get_fallback_models,
     get_model_info,
+    get_model_pricing,
     list_supported_models,
+    list_vision_models,
+    run_prompts_concurrent,
 )
 
 
+@pytest.fixture(autouse=True)
+def _reset_profile_overrides(mocker):
+    """Keep the per-model profile cache from leaking mocked profiles between tests."""
+    mocker.patch.dict("ai.core.openrouter._PROFILE_OVERRIDES", clear=True)
+    mocker.patch.dict("ai.core.openrouter._HTTP_CLIENTS", clear=True)
+
+
 class TestOpenRouterModels:
     """Test suite for OpenRouter model management."""
 
@@ -29,17 +52,32 @@ class TestOpenRouterModels:
         assert "pricing" in info
         assert "fallback_models" in info
         assert info["pricing"]["input_per_million"] == 3.0
+        assert info["provider"] == "anthropic"
+        assert info["is_anthropic"] is True
+        assert get_model_info("openai/gpt-5")["is_anthropic"] is False
 
     def test_get_model_info_invalid_model(self):
         """Test getting info for unsupported model."""
         with pytest.raises(ValueError, match="Model 'fake/model' not supported"):
             get_model_info("fake/model")
 
+    def test_get_model_pricing(self):
+        """Test per-token pricing is derived from the per-million registry."""
+        pricing = get_model_pricing("anthropic/claude-sonnet-4.5")
+
+        assert pricing.input_per_token == pytest.approx(3.0 / 1_000_000)
+        assert pricing.output_per_token == pytest.approx(15.0 / 1_000_000)
+
+    def test_get_model_pricing_invalid_model(self):
+        """Test getting pricing for unsupported model."""
+        with pytest.raises(ValueError, match="Model 'fake/model' not supported"):
+            get_model_pricing("fake/model")
+
     def test_get_fallback_models(self):
         """Test getting fallback models for a model."""
         fallbacks = get_fallback_models("anthropic/claude-sonnet-4.5")
 
-        assert isinstance(fallbacks, list)
+        assert isinstance(fallbacks, tuple)
         assert "anthropic/claude-3.5-haiku" in fallbacks
         assert "openai/gpt-5" in fallbacks
 
@@ -50,6 +88,48 @@ class TestOpenRouterModels:
         # Should be (1000/1M * 3.0) + (500/1M * 15.0) = 0.003 + 0.0075 = 0.0105
         assert cost == pytest.approx(0.0105)
 
+    def test_estimate_token_cost_cached(self):
+        """Test that cache reads and writes are priced at Anthropic's rates."""
+        cost = estimate_token_cost_cached(
+            "anthropic/claude-sonnet-4.5",
+            1000,
+            500,
+            cache_read_tokens=600,
+            cache_write_tokens=200,
+        )
+
+        # 200 uncached * $3 + 600 reads * $0.30 + 200 writes * $3.75 + 500 * $15
+        assert cost == pytest.approx((600 + 180 + 750 + 7500) / 1_000_000)
+        assert estimate_token_cost_cached(
+            "anthropic/claude-sonnet-4.5", 1000, 500
+        ) == pytest.approx(
+            estimate_token_cost("anthropic/claude-sonnet-4.5", 1000, 500)
+        )
+
+    def test_estimate_token_cost_cached_non_anthropic(self):
+        """Test that other providers' cached tokens are priced as regular input."""
+        cost = estimate_token_cost_cached(
+            "openai/gpt-5", 1000, 500, cache_read_tokens=600
+        )
+
+        assert cost == pytest.approx(estimate_token_cost("openai/gpt-5", 1000, 500))
+
+    def test_estimate_token_costs_batch(self):
+        """Test that batch estimates match per-call estimates row by row."""
+        rows = [
+            ("anthropic/claude-sonnet-4.5", 1000, 500),
+            ("openai/gpt-5", 200, 100),
+            ("anthropic/claude-sonnet-4.5", 0, 10),
+        ]
+        model_names, input_tokens, output_tokens = zip(*rows, strict=True)
+
+        costs = estimate_token_costs_batch(model_names, input_tokens, output_tokens)
+
+        assert costs == pytest.approx([estimate_token_cost(*row) for row in rows])
+
+        with pytest.raises(ValueError, match="must align"):
+            estimate_token_costs_batch(["openai/gpt-5"], [1, 2], [1])
+
     def test_estimate_token_cost_invalid_model(self):
         """Test cost estimation for invalid model."""
         with pytest.raises(ValueError, match="Model 'fake/model' not supported"):
@@ -59,19 +139,32 @@ class TestOpenRouterModels:
         """Test listing all supported models."""
         models = list_supported_models()
 
-        assert isinstance(models, list)
+        assert isinstance(models, tuple)
         assert "anthropic/claude-sonnet-4.5" in models
         assert "anthropic/claude-opus-4.1" in models
         assert "openai/gpt-5" in models
         assert len(models) == len(SUPPORTED_MODELS)
 
+    def test_list_vision_models(self):
+        """Test listing models that support vision."""
+        models = list_vision_models()
+
+        assert "anthropic/claude-sonnet-4.5" in models
+        assert "anthropic/claude-3.5-haiku" not in models
+        assert all(get_model_info(m)["supports_vision"] for m in models)
+
     def test_get_builtin_models(self):
         """Test getting builtin model registry."""
         models = get_builtin_models()
 
-        assert isinstance(models, dict)
+        assert isinstance(models, Mapping)
         assert models == SUPPORTED_MODELS
 
+    def test_builtin_models_are_read_only(self):
+        """Test that the shared model registry can't be mutated by callers."""
+        with pytest.raises(TypeError):
+            get_builtin_models()["fake/model"] = {}
+
     def test_create_openrouter_model_valid(self, mocker):
         """Test creating valid OpenRouter model."""
         if not config.openrouter_api_key:
@@ -208,6 +301,52 @@ class TestOpenRouterModels:
         call_args = mock_model_class.call_args
         assert call_args.kwargs["profile"] is not None
 
+    def test_create_openrouter_model_merges_extra_body(self, mocker, monkeypatch):
+        """Test that caller extra_body is merged without mutating shared state."""
+        monkeypatch.setattr(config, "openrouter_api_key", "test-key")
+        mocker.patch("ai.core.openrouter.OpenRouterProvider")
+        mock_model_class = mocker.patch("ai.core.openrouter.OpenRouterModel")
+        mocker.patch("httpx.AsyncClient")
+
+        caller_extra_body = {"transforms": ["middle-out"]}
+        for _ in range(2):
+            create_openrouter_model(
+                "anthropic/claude-sonnet-4.5",
+                settings={"extra_body": caller_extra_body},
+            )
+
+        extra_body = mock_model_class.call_args.kwargs["settings"]["extra_body"]
+        assert extra_body["transforms"] == ["middle-out"]
+        assert tuple(extra_body["models"]) == get_fallback_models(
+            "anthropic/claude-sonnet-4.5"
+        )
+        assert extra_body["caching"]["enabled"] is True
+        assert caller_extra_body == {"transforms": ["middle-out"]}
+
+        create_openrouter_model(
+            "anthropic/claude-sonnet-4.5", enable_prompt_caching=False
+        )
+        extra_body = mock_model_class.call_args.kwargs["settings"]["extra_body"]
+        assert "caching" not in extra_body
+
+    def test_create_openrouter_model_reuses_http_client(self, mocker, monkeypatch):
+        """Test that models share a pooled client routed through the transport."""
+        monkeypatch.setattr(config, "openrouter_api_key", "test-key")
+        mock_provider_class = mocker.patch("ai.core.openrouter.OpenRouterProvider")
+        mocker.patch("ai.core.openrouter.OpenRouterModel")
+
+        create_openrouter_model("anthropic/claude-sonnet-4.5", agent_name="A")
+        create_openrouter_model("openai/gpt-5", agent_name="A")
+        create_openrouter_model("openai/gpt-5", agent_name="B")
+
+        clients = [
+            call.kwargs["http_client"] for call in mock_provider_class.call_args_list
+        ]
+        assert clients[0] is clients[1]
+        assert clients[1] is not clients[2]
+        assert clients[2].headers["X-Title"] == "100x - B"
+        assert isinstance(clients[0]._transport, OpenRouterTransport)
+
 
 class TestOpenRouterSettings:
     """Test suite for OpenRouter settings."""
@@ -219,7 +358,7 @@ class TestOpenRouterSettings:
         )
 
         assert settings.reasoning_effort == "high"
-        assert settings.fallback_models == ["anthropic/claude-3.5-haiku"]
+        assert settings.fallback_models == ("anthropic/claude-3.5-haiku",)
         assert settings.include_reasoning_tokens is True
 
     def test_openrouter_settings_to_request_body(self):
@@ -244,6 +383,57 @@ class TestOpenRouterSettings:
         assert "reasoning" not in body
         assert body["models"] == ["model1"]
 
+    def test_openrouter_settings_request_body_is_independent(self):
+        """Test that mutating one request body doesn't affect later ones."""
+        settings = OpenRouterSettings(reasoning_effort="low", fallback_models=["m1"])
+
+        body = settings.to_request_body()
+        body["reasoning"]["effort"] = "high"
+        body["models"].append("m2")
+        body["extra"] = True
+
+        assert OpenRouterSettings(
+            reasoning_effort="low", fallback_models=["m1"]
+        ).to_request_body() == {
+            "reasoning": {"effort": "low", "exclude": False, "enabled": True},
+            "models": ["m1"],
+        }
+
+    def test_openrouter_settings_validation(self):
+        """Test that settings reject unknown efforts and are immutable."""
+        with pytest.raises(ValueError, match="Invalid reasoning_effort"):
+            OpenRouterSettings(reasoning_effort="extreme")
+
+        settings = OpenRouterSettings()
+        with pytest.raises(FrozenInstanceError):
+            settings.reasoning_effort = "high"
+
+    @pytest.mark.parametrize(
+        "kwargs",
+        [
+            {"fallback_models": "openai/gpt-5"},
+            {"fallback_models": ["openai/gpt-5", 1]},
+            {"include_reasoning_tokens": "no"},
+            {"enable_local_cache": 1},
+        ],
+    )
+    def test_openrouter_settings_rejects_wrong_types(self, kwargs):
+        """Test that field types are checked now that Pydantic isn't."""
+        with pytest.raises(TypeError):
+            OpenRouterSettings(**kwargs)
+
+        with pytest.raises(TypeError, match="unexpected keyword"):
+            OpenRouterSettings(fallback_model=["openai/gpt-5"])
+
+    def test_openrouter_settings_are_hashable(self):
+        """Test that settings built from a list hash and compare as equal."""
+        from_list = OpenRouterSettings(fallback_models=["m1", "m2"])
+        from_tuple = OpenRouterSettings(fallback_models=("m1", "m2"))
+
+        assert from_list.fallback_models == ("m1", "m2")
+        assert from_list == from_tuple
+        assert len({from_list, from_tuple}) == 1
+
 
 class TestCachingSettings:
     """Test suite for caching settings."""
@@ -264,3 +454,498 @@ class TestCachingSettings:
         assert settings.enabled is False
         assert settings.cache_user_messages is True
         assert settings.cache_system_messages is True  # Default
+
+
+class TestMessageCaching:
+    """Test suite for cache_control placement on mapped messages."""
+
+    @staticmethod
+    def _model(**caching) -> OpenRouterModel:
+        """Build an OpenRouterModel carrying only caching settings."""
+        model = object.__new__(OpenRouterModel)
+        model._settings = {
+            "extra_body": {"caching": asdict(CachingSettings(**caching))}
+        }
+        return model
+
+    def _map(self, mocker, mapped_messages, **caching):
+        """Run OpenRouterModel._map_messages over pre-mapped messages."""
+        mocker.patch(
+            "pydantic_ai.models.openai.OpenAIChatModel._map_messages",
+            return_value=mapped_messages,
+        )
+        return asyncio.run(self._model(**caching)._map_messages([]))
+
+    @staticmethod
+    def _cached(message):
+        content = message["content"]
+        return isinstance(content, list) and "cache_control" in content[-1]
+
+    def test_only_last_system_and_last_two_user_messages_cached(self, mocker):
+        """Test that breakpoints go on the most recent messages only."""
+        messages = [
+            {"role": "system", "content": "sys 1"},
+            {"role": "system", "content": "sys 2"},
+            *[
+                {"role": role, "content": f"{role} {i}"}
+                for i in range(4)
+                for role in ("user", "assistant")
+            ],
+        ]
+
+        result = self._map(mocker, messages, cache_user_messages=True)
+
+        cached = [m["content"][0]["text"] for m in result if self._cached(m)]
+        assert cached == ["sys 2", "user 2", "user 3"]
+
+    def test_user_messages_not_cached_by_default(self, mocker):
+        """Test that only the system message is marked with default settings."""
+        messages = [
+            {"role": "system", "content": "sys"},
+            {"role": "user", "content": [{"type": "text", "text": "hello"}]},
+        ]
+
+        result = self._map(mocker, messages)
+
+        assert self._cached(result[0])
+        assert not self._cached(result[1])
+
+    def test_disabled_caching_leaves_messages_untouched(self, mocker):
+        """Test that no markers are added when caching is disabled."""
+        messages = [{"role": "system", "content": "sys"}]
+
+        result = self._map(mocker, messages, enabled=False)
+
+        assert result == [{"role": "system", "content": "sys"}]
+
+    def test_changed_system_prefix_is_flagged(self, mocker):
+        """Test that a changed cached prefix between requests is logged."""
+        mock_logger = mocker.patch("ai.core.openrouter.logger")
+        mocker.patch(
+            "pydantic_ai.models.openai.OpenAIChatModel._map_messages",
+            side_effect=lambda messages: [
+                {"role": "system", "content": messages[0]},
+                {"role": "user", "content": "hi"},
+            ],
+        )
+        model = self._model()
+
+        for system_prompt in ("stable", "stable", "changed"):
+            asyncio.run(model._map_messages([system_prompt]))
+
+        changed = [
+            call
+            for call in mock_logger.debug.call_args_list
+            if "prefix changed" in call.args[0]
+        ]
+        assert len(changed) == 1
+
+    def test_only_last_tool_definition_cached(self, mocker):
+        """Test that one breakpoint on the last tool covers the tool catalog."""
+        mocker.patch(
+            "pydantic_ai.models.openai.OpenAIChatModel._get_tools",
+            side_effect=lambda _: [{"function": {"name": f"t{i}"}} for i in range(3)],
+        )
+
+        tools = self._model()._get_tools(None)
+        uncached = self._model(cache_tools=False)._get_tools(None)
+
+        assert ["cache_control" in tool for tool in tools] == [False, False, True]
+        assert not any("cache_control" in tool for tool in uncached)
+
+
+class TestProcessResponse:
+    """Test suite for OpenRouter response handling."""
+
+    @staticmethod
+    def _process(mocker, response):
+        """Run OpenRouterModel._process_response with the parent stubbed out."""
+        mocker.patch("pydantic_ai.models.openai.OpenAIChatModel._process_response")
+        model = object.__new__(OpenRouterModel)
+        model._model_name = "openai/gpt-5"
+        model._process_response(response)
+
+    def test_missing_created_is_filled_in(self, mocker):
+        """Test that a missing created timestamp is set to the current time."""
+        response = SimpleNamespace(created=None, choices=[], model="openai/gpt-5")
+
+        self._process(mocker, response)
+
+        assert isinstance(response.created, int)
+        assert response.created > 0
+
+    def test_missing_choices_raises(self, mocker):
+        """Test that a response without choices is surfaced as a 502."""
+        response = SimpleNamespace(created=1, model="openai/gpt-5")
+
+        with pytest.raises(ModelHTTPError, match="no choices"):
+            self._process(mocker, response)
+
+
+class TestOpenRouterTransport:
+    """Test suite for the OpenRouter request interceptor."""
+
+    _COMPLETION = {
+        "id": "gen-1",
+        "object": "chat.completion",
+        "created": 1,
+        "model": "anthropic/claude-sonnet-4.5",
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": "hi"},
+                "finish_reason": "stop",
+            }
+        ],
+    }
+
+    def test_body_is_forwarded_untouched(self, mocker):
+        """Test that requests are forwarded byte-for-byte."""
+        send = mocker.patch(
+            "httpx.AsyncHTTPTransport.handle_async_request",
+            return_value=httpx.Response(200),
+        )
+        body = b'{"model":"openai/gpt-5","messages":[]}'
+        request = httpx.Request(
+            "POST", "https://openrouter.ai/api/v1/chat/completions", content=body
+        )
+
+        asyncio.run(OpenRouterTransport().handle_async_request(request))
+
+        assert send.call_args.args[0].read() == body
+
+    def test_openrouter_params_are_sent_top_level(self, mocker, monkeypatch):
+        """Test that the real client sends extra_body params at the top level."""
+        from pydantic_ai import Agent
+
+        monkeypatch.setattr(config, "openrouter_api_key", "test-key")
+        send = mocker.patch(
+            "httpx.AsyncHTTPTransport.handle_async_request",
+            side_effect=lambda _request: httpx.Response(200, json=self._COMPLETION),
+        )
+        model = create_openrouter_model(
+            "anthropic/claude-sonnet-4.5",
+            settings={"extra_body": {"reasoning": {"effort": "low"}}},
+        )
+
+        Agent(model).run_sync("hello")
+
+        sent_body = orjson.loads(send.call_args.args[0].content)
+        assert sent_body["reasoning"] == {"effort": "low"}
+        assert sent_body["models"] == list(
+            get_fallback_models("anthropic/claude-sonnet-4.5")
+        )
+        assert sent_body["caching"]["enabled"] is True
+        assert "extra_body" not in sent_body
+
+
+class TestLocalResponseCache:
+    """Test suite for the opt-in local response cache."""
+
+    @staticmethod
+    def _send_all(
+        mocker,
+        bodies: list[bytes],
+        urls: list[str] | None = None,
+    ) -> tuple[MagicMock, list[httpx.Response]]:
+        """Send requests through one transport and return the upstream mock."""
+        send = mocker.patch(
+            "httpx.AsyncHTTPTransport.handle_async_request",
+            side_effect=lambda _request: httpx.Response(
+                200, stream=httpx.ByteStream(b'{"id":"1"}')
+            ),
+        )
+        transport = OpenRouterTransport()
+
+        async def send_all():
+            responses = []
+            for body, url in zip(
+                bodies,
+                urls or ["https://openrouter.ai/api/v1/chat/completions"] * len(bodies),
+                strict=True,
+            ):
+                request = httpx.Request("POST", url, content=body)
+                response = await transport.handle_async_request(request)
+                await response.aread()
+                responses.append(response)
+            return responses
+
+        return send, asyncio.run(send_all())
+
+    def test_settings_add_local_cache_flag(self):
+        """Test that the flag is only added to the request body when enabled."""
+        assert OpenRouterSettings(enable_local_cache=True).to_request_body() == {
+            "local_cache": True
+        }
+        assert "local_cache" not in OpenRouterSettings().to_request_body()
+
+    def test_identical_deterministic_requests_hit_cache(self, mocker):
+        """Test that repeated temperature-0 requests only reach OpenRouter once."""
+        body = orjson.dumps({"messages": [], "temperature": 0, "local_cache": True})
+
+        send, responses = self._send_all(mocker, [body, body])
+
+        assert send.call_count == 1
+        assert [r.content for r in responses] == [b'{"id":"1"}', b'{"id":"1"}']
+        sent_body = orjson.loads(send.call_args.args[0].content)
+        assert "local_cache" not in sent_body
+
+    def test_sampled_requests_are_not_cached(self, mocker):
+        """Test that requests with temperature > 0 always go to OpenRouter."""
+        body = orjson.dumps({"messages": [], "temperature": 0.7, "local_cache": True})
+
+        send, _ = self._send_all(mocker, [body, body])
+
+        assert send.call_count == 2
+
+    def test_cache_key_includes_url(self, mocker):
+        """Test that the same body sent to different endpoints isn't shared."""
+        body = orjson.dumps({"messages": [], "temperature": 0, "local_cache": True})
+        urls = [
+            "https://openrouter.ai/api/v1/chat/completions",
+            "https://eu.openrouter.ai/api/v1/chat/completions",
+        ]
+
+        send, _ = self._send_all(mocker, [body, body], urls)
+
+        assert send.call_count == 2
+
+    def test_create_openrouter_model_enables_local_cache(self, mocker, monkeypatch):
+        """Test that the model factory flags requests for the local cache."""
+        monkeypatch.setattr(config, "openrouter_api_key", "test-key")
+        mocker.patch("ai.core.openrouter.OpenRouterProvider")
+        mock_model_class = mocker.patch("ai.core.openrouter.OpenRouterModel")
+
+        create_openrouter_model("openai/gpt-5")
+        extra_body = mock_model_class.call_args.kwargs["settings"]["extra_body"]
+        assert "local_cache" not in extra_body
+
+        create_openrouter_model("openai/gpt-5", enable_local_cache=True)
+        extra_body = mock_model_class.call_args.kwargs["settings"]["extra_body"]
+        assert extra_body["local_cache"] is True
+
+    def test_local_cache_through_real_client(self, mocker, monkeypatch):
+        """Test that a model built with the flag serves repeats from the cache."""
+        monkeypatch.setattr(config, "openrouter_api_key", "test-key")
+        completion = {
+            "id": "gen-1",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "openai/gpt-5",
+            "choices": [
+                {
+                    "index": 0,
+                    "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": "hi"},
+                }
+            ],
+        }
+        send = mocker.patch(
+            "httpx.AsyncHTTPTransport.handle_async_request",
+            side_effect=lambda _request: httpx.Response(
+                200,
+                headers={"content-type": "application/json"},
+                stream=httpx.ByteStream(orjson.dumps(completion)),
+            ),
+        )
+        model = create_openrouter_model(
+            "anthropic/claude-sonnet-4.5",
+            settings={"temperature": 0},
+            enable_local_cache=True,
+        )
+
+        responses = asyncio.run(
+            run_prompts_concurrent(model, ["same"], max_concurrency=1)
+        )
+        responses += asyncio.run(run_prompts_concurrent(model, ["same"]))
+
+        assert send.call_count == 1
+        assert [r.parts[0].content for r in responses] == ["hi", "hi"]
+        assert "local_cache" not in orjson.loads(send.call_args.args[0].content)
+
+    def test_requests_without_flag_are_not_cached(self, mocker):
+        """Test that caching stays off unless requested."""
+        body = orjson.dumps({"messages": [], "temperature": 0})
+
+        send, _ = self._send_all(mocker, [body, body])
+
+        assert send.call_count == 2
+
+
+class TestRunPromptsConcurrent:
+    """Test suite for concurrent raw model requests."""
+
+    def test_responses_keep_prompt_order_and_respect_limit(self):
+        """Test that responses line up with prompts and concurrency is capped."""
+        in_flight = peak = 0
+
+        async def request(messages, _settings, _parameters):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0)
+            in_flight -= 1
+            return messages[0].parts[0].content.upper()
+
+        model = MagicMock(request=request)
+        prompts = [f"prompt {i}" for i in range(6)]
+
+        responses = asyncio.run(
+            run_prompts_concurrent(model, prompts, max_concurrency=2)
+        )
+
+        assert responses == [prompt.upper() for prompt in prompts]
+        assert peak == 2
+
+    def test_invalid_concurrency(self):
+        """Test that a non-positive concurrency limit is rejected."""
+        with pytest.raises(ValueError, match="max_concurrency"):
+            asyncio.run(run_prompts_concurrent(MagicMock(), ["x"], max_concurrency=0))
+
+
+class TestSharedHttpClient:
+    """Test suite for the shared OpenRouter HTTP clients."""
+
+    @staticmethod
+    def _stub_upstream(mocker) -> MagicMock:
+        """Answer every upstream request with an empty 200."""
+        return mocker.patch(
+            "httpx.AsyncHTTPTransport.handle_async_request",
+            side_effect=lambda _request: httpx.Response(200),
+        )
+
+    def test_each_event_loop_gets_its_own_pool(self, mocker):
+        """Test that a client reused across loops never shares their connections."""
+        self._stub_upstream(mocker)
+        client = _get_http_client(60.0, "Test")
+
+        async def send():
+            await client.post("https://openrouter.ai/api/v1/chat/completions")
+            return client._transport._pool()
+
+        first, second = asyncio.run(send()), asyncio.run(send())
+
+        assert first is not second
+        assert _get_http_client(60.0, "Test") is client
+
+    def test_aclose_http_clients_keeps_clients_usable(self, mocker):
+        """Test that closing a loop's connections leaves the client reusable."""
+        send = self._stub_upstream(mocker)
+        client = _get_http_client(60.0, "Test")
+        url = "https://openrouter.ai/api/v1/chat/completions"
+
+        async def send_close_send():
+            await client.post(url)
+            closed = client._transport._pool()
+            await aclose_http_clients()
+            await client.post(url)
+            return closed, client._transport._pool()
+
+        closed, reopened = asyncio.run(send_close_send())
+
+        assert send.call_count == 2
+        assert closed is not reopened
+
+
+class TestDirectTransport:
+    """Test suite for sending OpenRouter requests over aiohttp."""
+
+    def test_direct_transport_round_trip(self):
+        """Test that direct mode sends and decodes like httpx does."""
+        from aiohttp import web
+
+        async def echo(request):
+            body = await request.json()
+            return web.json_response(
+                {"received": body, "title": request.headers["X-Title"]}
+            )
+
+        async def round_trip():
+            app = web.Application()
+            app.router.add_post("/api/v1/chat/completions", echo)
+            runner = web.AppRunner(app)
+            await runner.setup()
+            site = web.TCPSite(runner, "127.0.0.1", 0)
+            await site.start()
+            port = site._server.sockets[0].getsockname()[1]
+            try:
+                async with httpx.AsyncClient(
+                    transport=OpenRouterTransport(direct=True),
+                    headers={"X-Title": "100x - Test"},
+                ) as client:
+                    return await client.post(
+                        f"http://127.0.0.1:{port}/api/v1/chat/completions",
+                        json={"model": "m", "models": ["a"]},
+                    )
+            finally:
+                await runner.cleanup()
+
+        response = asyncio.run(round_trip())
+
+        assert response.status_code == 200
+        assert response.json() == {
+            "received": {"model": "m", "models": ["a"]},
+            "title": "100x - Test",
+        }
+
+    @pytest.mark.parametrize(
+        ("error", "expected"),
+        [
+            ("payload", httpx.ReadError),
+            ("timeout", httpx.ReadTimeout),
+        ],
+    )
+    def test_body_errors_map_to_httpx(self, mocker, error, expected):
+        """Test that aiohttp errors while reading the body become httpx errors."""
+        import aiohttp
+
+        from ai.core.openrouter import _AiohttpResponseStream
+
+        raised = {
+            "payload": aiohttp.ClientPayloadError("Response payload is not completed"),
+            "timeout": TimeoutError("Timeout on reading data from socket"),
+        }[error]
+
+        async def iter_chunked(_size):
+            yield b"partial"
+            raise raised
+
+        response = mocker.Mock()
+        response.content.iter_chunked = iter_chunked
+        request = httpx.Request("POST", "https://openrouter.ai/api/v1/chat/completions")
+
+        async def read_body():
+            return [chunk async for chunk in _AiohttpResponseStream(response, request)]
+
+        with pytest.raises(expected) as exc_info:
+            asyncio.run(read_body())
+
+        assert exc_info.value.request is request
+        assert exc_info.value.__cause__ is raised
+
+    def test_aclose_closes_the_loops_session(self):
+        """Test that closing the transport closes the aiohttp session it opened."""
+
+        async def open_and_close():
+            transport = OpenRouterTransport(direct=True)
+            session = transport._pool()._get_session()
+            await transport.aclose()
+            return session
+
+        assert asyncio.run(open_and_close()).closed
+
+    def test_create_openrouter_model_direct_client(self, mocker, monkeypatch):
+        """Test that direct mode gets its own shared client."""
+        monkeypatch.setattr(config, "openrouter_api_key", "test-key")
+        mock_provider_class = mocker.patch("ai.core.openrouter.OpenRouterProvider")
+        mocker.patch("ai.core.openrouter.OpenRouterModel")
+
+        create_openrouter_model("openai/gpt-5")
+        create_openrouter_model("openai/gpt-5", direct=True)
+
+        pooled, direct = (
+            call.kwargs["http_client"] for call in mock_provider_class.call_args_list
+        )
+        assert pooled is not direct
+        assert direct._transport._direct is True
+        assert pooled._transport._direct is False
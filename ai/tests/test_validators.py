@@ -0,0 +1,331 @@
+"""Tests for .agent.md validation."""
+
+from pathlib import Path
+import asyncio
+import dataclasses
+import io
+import json
+import os
+
+import pytest
+
+from ai.core.agent_config import JINJA_ENV
+from ai.core.validators import (
+    AgentValidationError,
+    AgentValidator,
+    format_validation_results,
+)
+
+FIXTURE = Path("ai/tests/fixtures/simple_test.agent.md")
+
+# A modification time old enough for results to be cached
+SETTLED_MTIME_NS = 1_600_000_000 * 1_000_000_000
+
+
+def _settle(path: Path) -> None:
+    """Backdate a freshly written file so its validation result is cached."""
+    os.utime(path, ns=(SETTLED_MTIME_NS, SETTLED_MTIME_NS))
+
+
+@pytest.fixture(autouse=True)
+def _clear_validation_cache():
+    """Keep cached validation results from leaking between tests."""
+    AgentValidator.clear_validation_cache()
+    yield
+    AgentValidator.clear_validation_cache()
+
+
+class TestAgentValidator:
+    """Test suite for AgentValidator."""
+
+    def test_validate_valid_file(self):
+        """Test that a well-formed agent file has no errors."""
+        assert AgentValidator().validate_file(FIXTURE) == []
+
+    def test_validate_missing_file(self, tmp_path):
+        """Test that a missing file is reported as a structure error."""
+        errors = AgentValidator().validate_file(tmp_path / "missing.agent.md")
+
+        assert len(errors) == 1
+        assert errors[0].error_type == "structure"
+        assert "File not found" in errors[0].message
+
+    def test_validate_file_with_malformed_history(self, tmp_path):
+        """Test that a non-mapping evolution_history entry doesn't crash validation."""
+        agent_file = tmp_path / "agent.agent.md"
+        agent_file.write_text(
+            FIXTURE.read_text().replace(
+                "temperature: 0.5\n",
+                'temperature: 0.5\nevolution_history: ["v1 note"]\n',
+                1,
+            )
+        )
+
+        assert AgentValidator().validate_file(agent_file) == []
+
+    def test_validate_directory_finds_nested_files(self, tmp_path):
+        """Test that agent files are found recursively, keyed by relative path."""
+        (tmp_path / "nested" / "deeper").mkdir(parents=True)
+        content = FIXTURE.read_text()
+        (tmp_path / "top.agent.md").write_text(content)
+        (tmp_path / "nested" / "deeper" / "inner.agent.md").write_text(content)
+        (tmp_path / "nested" / "notes.md").write_text("not an agent")
+
+        results = AgentValidator().validate_directory(tmp_path)
+
+        assert sorted(results) == ["nested/deeper/inner.agent.md", "top.agent.md"]
+        assert all(errors == [] for errors in results.values())
+
+    def test_validate_directory_reports_each_file(self, tmp_path):
+        """Test that parallel validation attributes errors to the right file."""
+        content = FIXTURE.read_text()
+        for i in range(20):
+            (tmp_path / f"valid_{i:02}.agent.md").write_text(content)
+        (tmp_path / "broken.agent.md").write_text("no frontmatter here")
+
+        results = AgentValidator().validate_directory(tmp_path)
+
+        assert len(results) == 21
+        assert results["broken.agent.md"]
+        assert all(
+            errors == [] for path, errors in results.items() if path.startswith("valid")
+        )
+
+    def test_validate_directory_async_matches_sync(self, tmp_path):
+        """Test that async validation returns the same results as the sync path."""
+        content = FIXTURE.read_text()
+        for i in range(5):
+            (tmp_path / f"agent_{i}.agent.md").write_text(content)
+        (tmp_path / "broken.agent.md").write_text("no frontmatter here")
+        validator = AgentValidator()
+
+        async_results = asyncio.run(
+            validator.validate_directory_async(tmp_path, max_concurrency=2)
+        )
+
+        assert async_results == validator.validate_directory(tmp_path)
+        assert async_results["broken.agent.md"]
+
+    def test_validate_empty_directory(self, tmp_path):
+        """Test that a directory without agent files yields no results."""
+        assert AgentValidator().validate_directory(tmp_path) == {}
+
+    def test_unchanged_file_uses_cached_result(self, tmp_path, mocker):
+        """Test that re-validating an unchanged file skips the validation layers."""
+        agent_file = tmp_path / "agent.agent.md"
+        agent_file.write_text(FIXTURE.read_text())
+        _settle(agent_file)
+        uncached = mocker.spy(AgentValidator, "_validate_file_uncached")
+
+        first = AgentValidator().validate_file(agent_file)
+        second = AgentValidator().validate_file(str(agent_file))
+
+        assert first == second == []
+        assert uncached.call_count == 1
+
+    def test_recently_modified_file_is_not_cached(self, tmp_path, mocker):
+        """Test that a file edited moments ago is validated every time."""
+        agent_file = tmp_path / "agent.agent.md"
+        agent_file.write_text(FIXTURE.read_text())
+        uncached = mocker.spy(AgentValidator, "_validate_file_uncached")
+
+        AgentValidator().validate_file(agent_file)
+        AgentValidator().validate_file(agent_file)
+
+        assert uncached.call_count == 2
+
+    def test_edit_with_same_mtime_and_size_is_revalidated(self, tmp_path):
+        """Test that an edit a coarse mtime can't see is still picked up."""
+        agent_file = tmp_path / "agent.agent.md"
+        agent_file.write_text(FIXTURE.read_text())
+        _settle(agent_file)
+        assert AgentValidator().validate_file(agent_file) == []
+
+        # Same length, same mtime: only the ctime tells the versions apart
+        agent_file.write_text(FIXTURE.read_text().replace("name: ", "nope: ", 1))
+        _settle(agent_file)
+
+        errors = AgentValidator().validate_file(agent_file)
+        assert any("name" in error.message for error in errors)
+
+    def test_subclass_results_are_cached_separately(self, tmp_path):
+        """Test that a subclass with extra checks doesn't get base class results."""
+
+        class StrictValidator(AgentValidator):
+            def _validate_config_schema(self, config):
+                return [
+                    *super()._validate_config_schema(config),
+                    AgentValidationError(None, "too lenient", "schema"),
+                ]
+
+        agent_file = tmp_path / "agent.agent.md"
+        agent_file.write_text(FIXTURE.read_text())
+
+        assert AgentValidator().validate_file(agent_file) == []
+        assert [e.message for e in StrictValidator().validate_file(agent_file)] == [
+            "too lenient"
+        ]
+        assert AgentValidator().validate_file(agent_file) == []
+
+    def test_modified_file_is_revalidated(self, tmp_path):
+        """Test that editing a file invalidates its cached result."""
+        agent_file = tmp_path / "agent.agent.md"
+        agent_file.write_text(FIXTURE.read_text())
+        validator = AgentValidator()
+        assert validator.validate_file(agent_file) == []
+
+        agent_file.write_text(FIXTURE.read_text().replace("name: ", "title: ", 1))
+        stat = agent_file.stat()
+        os.utime(agent_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+        errors = validator.validate_file(agent_file)
+        assert any("name" in error.message for error in errors)
+
+    @pytest.mark.parametrize(
+        ("content", "expected"),
+        [
+            ("---\nname: x\n---\nbody", []),
+            ("---\nname: x\n  ---  \nbody", []),
+            ("name: x\n", [(1, "must start with")]),
+            ("---\nname: x\n---- not a delimiter\n", [(None, "Missing closing")]),
+            ("---\n---\nbody", [(2, "Empty YAML")]),
+        ],
+    )
+    def test_validate_yaml_structure(self, content, expected):
+        """Test frontmatter delimiter detection and reported line numbers."""
+        errors = AgentValidator()._validate_yaml_structure(content)
+
+        assert len(errors) == len(expected)
+        for error, (line_number, message) in zip(errors, expected, strict=True):
+            assert error.line_number == line_number
+            assert message in error.message
+
+    @pytest.mark.parametrize(
+        "template", ["{% if x %}unclosed", "{{ value | not_a_filter }}"]
+    )
+    def test_invalid_template_is_reported(self, template):
+        """Test that syntax and compile-time template errors are both caught."""
+        errors = AgentValidator()._validate_single_template(template, "User Prompt")
+
+        assert len(errors) == 1
+        assert errors[0].error_type == "template_syntax"
+
+    def test_static_template_skips_parsing(self, mocker):
+        """Test that prompts without template markers are not parsed."""
+        compile_template = mocker.spy(JINJA_ENV, "compile")
+
+        errors = AgentValidator()._validate_single_template(
+            "Just plain text } with braces {", "System Prompt"
+        )
+
+        assert errors == []
+        compile_template.assert_not_called()
+
+    def test_valid_template_passes(self):
+        """Test that a valid template produces no errors."""
+        template = "{% for q in queries %}{{ q | upper }}{% endfor %}"
+
+        assert AgentValidator()._validate_single_template(template, "User Prompt") == []
+
+
+class TestAgentValidationError:
+    """Test suite for AgentValidationError."""
+
+    def test_errors_are_immutable_and_hashable(self):
+        """Test that errors can't be altered (cached results share them) and dedupe."""
+        error = AgentValidationError(line_number=1, message="x", error_type="schema")
+
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            error.message = "y"
+        assert len({error, AgentValidationError(1, "x", "schema")}) == 1
+
+
+class TestFormatValidationResults:
+    """Test suite for format_validation_results."""
+
+    def test_json_format(self):
+        """Test that JSON output lists every error field per file."""
+        results = {
+            "bad.agent.md": [
+                AgentValidationError(
+                    line_number=3, message="Broken", error_type="template_syntax"
+                )
+            ],
+            "good.agent.md": [],
+        }
+
+        assert json.loads(format_validation_results(results, "json")) == {
+            "bad.agent.md": [
+                {
+                    "line_number": 3,
+                    "message": "Broken",
+                    "error_type": "template_syntax",
+                    "severity": "error",
+                }
+            ],
+            "good.agent.md": [],
+        }
+
+    @pytest.mark.parametrize("output_format", ["human", "json", "github"])
+    def test_streamed_output_matches_returned_string(self, output_format):
+        """Test that writing to a stream produces the same text as the return value."""
+        results = {
+            "bad.agent.md": [
+                AgentValidationError(line_number=None, message="x", error_type="schema")
+            ],
+            "good.agent.md": [],
+        }
+        out = io.StringIO()
+
+        assert format_validation_results(results, output_format, out=out) is None
+        assert (
+            out.getvalue() == format_validation_results(results, output_format) + "\n"
+        )
+
+    def test_github_format(self):
+        """Test that GitHub output emits one annotation per error."""
+        results = {
+            "a.agent.md": [
+                AgentValidationError(line_number=2, message="Bad", error_type="schema"),
+                AgentValidationError(
+                    line_number=None,
+                    message="Meh",
+                    error_type="schema",
+                    severity="warning",
+                ),
+            ],
+            "b.agent.md": [],
+        }
+
+        assert format_validation_results(results, "github") == (
+            "::error file=a.agent.md,line=2::Bad\n::warning file=a.agent.md::Meh"
+        )
+
+    def test_human_format(self):
+        """Test that human output lists each file and summarizes the totals."""
+        results = {
+            "a.agent.md": [
+                AgentValidationError(line_number=2, message="Bad", error_type="schema"),
+                AgentValidationError(
+                    line_number=None,
+                    message="Meh",
+                    error_type="schema",
+                    severity="warning",
+                ),
+            ],
+            "b.agent.md": [],
+        }
+
+        assert format_validation_results(results).splitlines() == [
+            "",
+            "📄 a.agent.md:",
+            "  ❌ [SCHEMA] Line 2: Bad",
+            "  ⚠️ [SCHEMA] Meh",
+            "",
+            "✅ b.agent.md: Valid",
+            "",
+            "📊 Summary:",
+            "  Files: 1/2 valid",
+            "  Errors: 1",
+            "  Warnings: 1",
+        ]
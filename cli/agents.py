@@ -1,21 +1,28 @@
 """Agent management CLI commands."""
 
 from pathlib import Path
+import os
+import sys
 
 from rich.console import Console
-from rich.panel import Panel
-from rich.syntax import Syntax
-from rich.table import Table
 import click
 
-from ai.agents.base_agent import BaseAgent
-from ai.core.agent_config import AgentConfig
-from ai.core.config import config as app_config
-from ai.core.validators import AgentValidator, format_validation_results
-from helpers.logger import logger
+# Agent, config, and rich widget imports live inside each command so that
+# --help and shell completion don't pay for pydantic, logfire, and friends
 
 console = Console()
 
+# Output formats for `agents validate` (click normalizes e.g. JSON to json)
+_OUTPUT_FORMATS = click.Choice(("human", "json", "github"), case_sensitive=False)
+
+# (header, style, width) for each column of the `agents list` table
+_AGENT_TABLE_COLUMNS = (
+    ("Name", "cyan", 20),
+    ("Description", "green", 40),
+    ("Model", "yellow", 25),
+    ("Version", "magenta", 8),
+)
+
 
 @click.group("agents")
 def agents():
@@ -25,14 +32,24 @@ def agents():
 @agents.command("list")
 def list_agents():
     """List all available agents."""
+    from rich.table import Table
+
+    from ai.core.agent_config import AgentConfig
+    from helpers.logger import logger
+
     agents_dir = Path("ai/agents")
 
     if not agents_dir.exists():
         console.print("[red]Error: ai/agents directory not found[/red]")
         return
 
-    # Find all .agent.md files
-    agent_files = list(agents_dir.glob("*.agent.md"))
+    # Find all .agent.md files (scandir's entries answer is_file without a stat)
+    with os.scandir(agents_dir) as entries:
+        agent_files = sorted(
+            entry.path
+            for entry in entries
+            if entry.name.endswith(".agent.md") and entry.is_file()
+        )
 
     if not agent_files:
         console.print("[yellow]No agents found[/yellow]")
@@ -42,12 +59,10 @@ def list_agents():
     table = Table(
         title="🤖 Available Agents", show_header=True, header_style="bold cyan"
     )
-    table.add_column("Name", style="cyan", width=20)
-    table.add_column("Description", style="green", width=40)
-    table.add_column("Model", style="yellow", width=25)
-    table.add_column("Version", style="magenta", width=8)
+    for header, style, width in _AGENT_TABLE_COLUMNS:
+        table.add_column(header, style=style, width=width)
 
-    for agent_file in sorted(agent_files):
+    for agent_file in agent_files:
         try:
             config = AgentConfig.from_file(agent_file)
             # Truncate description if too long
@@ -64,7 +79,7 @@ def list_agents():
         except Exception as e:
             logger.error(f"Error loading {agent_file}: {e}")
             table.add_row(
-                agent_file.stem,
+                Path(agent_file).stem,
                 f"[red]Error: {str(e)[:40]}[/red]",
                 "N/A",
                 "N/A",
@@ -94,14 +109,24 @@ def run_agent(
         hundredx agents run patrick --query "What's your favorite dinosaur?"
         python -m cli.main agents run patrick -q "Tell me about space!"
     """
-    import json
+    from openai import APIStatusError
+    from pydantic_ai.exceptions import ModelHTTPError
+    from rich.console import Group
+    from rich.panel import Panel
+    from rich.syntax import Syntax
+    from rich.table import Table
+    import orjson
+
+    from ai.agents.base_agent import BaseAgent
+    from ai.core.config import config as app_config
+    from helpers.logger import logger
 
     # Parse context if provided
     context_dict = {}
     if context:
         try:
-            context_dict = json.loads(context)
-        except json.JSONDecodeError as e:
+            context_dict = orjson.loads(context)
+        except orjson.JSONDecodeError as e:
             console.print(f"[red]Invalid JSON context: {e}[/red]")
             return
 
@@ -129,30 +154,37 @@ def run_agent(
         with console.status("[bold green]Thinking...", spinner="dots"):
             result = agent.query(user_context={"query": query, **context_dict})
 
-        # Display result
-        console.print("\n[bold green]Response:[/bold green]\n")
-
+        # Display result and usage in one render
         if hasattr(result, "model_dump"):
             # Structured output
-            import json
-
-            result_json = json.dumps(result.model_dump(), indent=2)
-            syntax = Syntax(result_json, "json", theme="monokai", line_numbers=True)
-            console.print(syntax)
+            result_json = orjson.dumps(
+                result.model_dump(),
+                option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS,
+            ).decode()
+            output = Syntax(result_json, "json", theme="monokai", line_numbers=True)
         else:
             # Plain text output
-            console.print(Panel(str(result), border_style="green"))
+            output = Panel(str(result), border_style="green")
 
         # Show usage stats
         stats_table = Table(show_header=False, box=None)
         stats_table.add_column("Metric", style="cyan")
         stats_table.add_column("Value", style="yellow")
-        stats_table.add_row("Input tokens", str(agent.total_input_tokens))
-        stats_table.add_row("Output tokens", str(agent.total_output_tokens))
-        stats_table.add_row("Cost", f"${agent.total_cost:.4f}")
+        for metric, value in (
+            ("Input tokens", str(agent.total_input_tokens)),
+            ("Output tokens", str(agent.total_output_tokens)),
+            ("Cost", f"${agent.total_cost:.4f}"),
+        ):
+            stats_table.add_row(metric, value)
 
-        console.print("\n[bold]Usage:[/bold]")
-        console.print(stats_table)
+        console.print(
+            Group(
+                "\n[bold green]Response:[/bold green]\n",
+                output,
+                "\n[bold]Usage:[/bold]",
+                stats_table,
+            )
+        )
 
     except FileNotFoundError:
         console.print(f"[red]Agent '{agent_name}' not found[/red]")
@@ -161,8 +193,9 @@ def run_agent(
     except Exception as e:
         error_str = str(e)
 
-        # Check for authentication errors
-        if "401" in error_str or "authentication" in error_str.lower():
+        # Check for authentication errors (pydantic-ai wraps HTTP failures in
+        # ModelHTTPError; the openai client raises APIStatusError directly)
+        if isinstance(e, ModelHTTPError | APIStatusError) and e.status_code == 401:
             console.print("[red]Error: OpenRouter authentication failed[/red]")
             console.print("\n[yellow]Your API key may be invalid or expired.[/yellow]")
             console.print("Get a new key from: https://openrouter.ai/keys")
@@ -182,12 +215,14 @@ def run_agent(
 @click.argument("agent_name", required=False)
 @click.option(
     "--format",
-    type=click.Choice(["human", "json", "github"]),
+    type=_OUTPUT_FORMATS,
     default="human",
     help="Output format",
 )
 def validate_agent(agent_name: str | None, format: str):  # noqa: A002
     """Validate .agent.md file format and structure."""
+    from ai.core.validators import AgentValidator, format_validation_results
+
     agents_dir = Path("ai/agents")
     validator = AgentValidator()
 
@@ -204,13 +239,16 @@ def validate_agent(agent_name: str | None, format: str):  # noqa: A002
         # Validate all files in directory
         results = validator.validate_directory(agents_dir)
 
-    # Format and display results
-    output = format_validation_results(results, format)
-    console.print(output)
+    # Format and display results. Machine-readable formats go straight to
+    # stdout - rich would wrap long lines and treat [brackets] as markup
+    if format == "human":
+        console.print(format_validation_results(results, format))
+    else:
+        format_validation_results(results, format, out=sys.stdout)
 
     # Exit with error code if validation failed
     total_errors = sum(
-        len([e for e in errors if e.severity == "error"]) for errors in results.values()
+        error.severity == "error" for errors in results.values() for error in errors
     )
 
     if total_errors > 0:
@@ -221,6 +259,13 @@ def validate_agent(agent_name: str | None, format: str):  # noqa: A002
 @click.argument("agent_name")
 def explain_agent(agent_name: str):
     """Show detailed information about an agent."""
+    from rich.panel import Panel
+    from rich.syntax import Syntax
+    from rich.table import Table
+
+    from ai.core.agent_config import AgentConfig
+    from helpers.logger import logger
+
     try:
         agent_file = Path("ai/agents") / f"{agent_name}.agent.md"
         config = AgentConfig.from_file(agent_file)
@@ -0,0 +1,15 @@
+"""Shared fixtures for CLI tests."""
+
+from click.testing import CliRunner
+import pytest
+
+# The CLI imports the logger lazily, inside commands. Import it up front so
+# loguru's sink binds to the real stderr rather than the stream of whichever
+# CliRunner.invoke happens to run first (and is closed afterwards).
+import helpers.logger  # noqa: F401
+
+
+@pytest.fixture(scope="session")
+def runner():
+    """Click CLI test runner, shared by all CLI tests (each invoke is isolated)."""
+    return CliRunner()
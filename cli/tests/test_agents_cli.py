@@ -1,7 +1,10 @@
 """Tests for agent CLI commands."""
 
-from click.testing import CliRunner
-import pytest
+import json
+import subprocess
+import sys
+
+from pydantic_ai.exceptions import ModelHTTPError
 
 from cli.main import cli
 
@@ -9,11 +12,6 @@ from cli.main import cli
 class TestAgentsCLI:
     """Test suite for agent CLI commands."""
 
-    @pytest.fixture
-    def runner(self):
-        """Create Click CLI test runner."""
-        return CliRunner()
-
     def test_agents_list(self, runner):
         """Test agents list command."""
         result = runner.invoke(cli, ["agents", "list"])
@@ -90,6 +88,56 @@ class TestAgentsCLI:
             or "Error" in result.output  # Some error occurred
         )
 
+    def test_agents_run_renders_response_and_usage(self, runner, mocker):
+        """Test run output with the agent mocked out."""
+        agent = mocker.patch("ai.agents.base_agent.BaseAgent").return_value
+        agent.explain.return_value = "Patrick: loves dinosaurs"
+        agent.config.name = "Patrick"
+        agent.query.return_value = "T-Rex, obviously"
+        agent.total_input_tokens = 12
+        agent.total_output_tokens = 34
+        agent.total_cost = 0.0123
+
+        result = runner.invoke(cli, ["agents", "run", "patrick", "-q", "Favorite?"])
+
+        assert result.exit_code == 0
+        assert result.output.index("Response:") < result.output.index("T-Rex")
+        assert "Output tokens" in result.output
+        assert "$0.0123" in result.output
+
+    def test_agents_run_reports_authentication_failure(self, runner, mocker):
+        """Test that a 401 from the model gets the API key guidance."""
+        agent = mocker.patch("ai.agents.base_agent.BaseAgent").return_value
+        agent.explain.return_value = "Patrick"
+        agent.config.name = "Patrick"
+        agent.query.side_effect = ModelHTTPError(401, "anthropic/claude-sonnet-4.5")
+
+        result = runner.invoke(cli, ["agents", "run", "patrick", "-q", "hi"])
+
+        assert result.exit_code == 1
+        assert "authentication failed" in result.output
+
+    def test_agents_run_other_errors_are_not_auth_failures(self, runner, mocker):
+        """Test that an error merely mentioning authentication is reported as is."""
+        agent = mocker.patch("ai.agents.base_agent.BaseAgent").return_value
+        agent.explain.return_value = "Patrick"
+        agent.config.name = "Patrick"
+        agent.query.side_effect = RuntimeError("Retry 401 of authentication docs")
+
+        result = runner.invoke(cli, ["agents", "run", "patrick", "-q", "hi"])
+
+        assert result.exit_code == 1
+        assert "Error running agent" in result.output
+        assert "authentication failed" not in result.output
+
+    def test_agents_run_rejects_invalid_context(self, runner):
+        """Test that malformed --context JSON is reported before running."""
+        result = runner.invoke(
+            cli, ["agents", "run", "patrick", "-q", "hi", "-c", "{not json"]
+        )
+
+        assert "Invalid JSON context" in result.output
+
     def test_agents_run_nonexistent(self, runner):
         """Test running non-existent agent."""
         result = runner.invoke(cli, ["agents", "run", "nonexistent", "--query", "test"])
@@ -110,6 +158,26 @@ class TestAgentsCLI:
             # Some extra text might be present, that's ok
             pass
 
+    def test_validate_json_output_is_exact(self, runner, tmp_path, monkeypatch):
+        """Test that JSON output is valid JSON even with long, bracketed messages."""
+        agents_dir = tmp_path / "ai" / "agents"
+        agents_dir.mkdir(parents=True)
+        (agents_dir / "broken.agent.md").write_text("[red]" + "x" * 300)
+        monkeypatch.chdir(tmp_path)
+
+        result = runner.invoke(cli, ["agents", "validate", "--format", "json"])
+
+        assert result.exit_code == 1
+        errors = json.loads(result.stdout)["broken.agent.md"]
+        assert errors[0]["error_type"] == "structure"
+
+    def test_validate_format_is_case_insensitive(self, runner):
+        """Test that output format names are accepted in any case."""
+        result = runner.invoke(cli, ["agents", "validate", "--format", "JSON"])
+
+        assert result.exit_code == 0
+        assert json.loads(result.stdout) == {"patrick.agent.md": []}
+
     def test_validate_github_output(self, runner):
         """Test validation with GitHub Actions output format."""
         result = runner.invoke(cli, ["agents", "validate", "--format", "github"])
@@ -124,3 +192,19 @@ class TestAgentsCLI:
 
         assert result.exit_code == 0
         assert "0.1.0" in result.output
+
+    def test_help_skips_heavy_imports(self):
+        """Test that --help doesn't import the agent stack."""
+        code = (
+            "import sys\n"
+            "from click.testing import CliRunner\n"
+            "from cli.main import cli\n"
+            "CliRunner().invoke(cli, ['agents', '--help'])\n"
+            "print(sorted(m for m in ('ai.agents.base_agent', 'pydantic_ai', 'logfire')"
+            " if m in sys.modules))\n"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        )
+
+        assert result.stdout.strip() == "[]"
@@ -1,19 +1,11 @@
 """Tests for CLI error messages and UX."""
 
-from click.testing import CliRunner
-import pytest
-
 from cli.main import cli
 
 
 class TestCLIErrorMessages:
     """Test that CLI provides helpful error messages."""
 
-    @pytest.fixture
-    def runner(self):
-        """Create Click CLI test runner."""
-        return CliRunner()
-
     def test_run_missing_agent_name(self, runner):
         """Test that missing agent name shows helpful error."""
         result = runner.invoke(cli, ["agents", "run", "-q", "test query"])
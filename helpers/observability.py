@@ -1,8 +1,11 @@
 """Observability setup using Logfire with intelligent environment detection."""
 
 from contextlib import contextmanager
+from functools import lru_cache
+import os
 import sys
 
+from loguru import logger as _loguru
 import logfire as _logfire
 
 from ai.core.config import config
@@ -10,18 +13,53 @@ from helpers.logger import logger
 
 __all__ = ["logfire"]
 
+# Attributes worth showing in console output (kept in the caller's order)
+_CONSOLE_ATTRIBUTES = frozenset(
+    {
+        "agent_name",
+        "model",
+        "operation",
+        "error_type",
+        "token_symbol",
+        "strategy_name",
+    }
+)
+
+# Loguru severity numbers for the levels UnifiedLogger emits
+_DEBUG, _INFO, _WARNING, _ERROR = (
+    _loguru.level(name).no for name in ("DEBUG", "INFO", "WARNING", "ERROR")
+)
+
+
+def _console_enabled(level_no: int) -> bool:
+    """Whether any loguru sink accepts this level, so formatting is worthwhile.
+
+    Reads loguru's running minimum across sinks, which tracks sinks added or
+    removed at runtime. Logfire applies its own level filtering.
+    """
+    return level_no >= _loguru._core.min_level  # noqa: SLF001
+
 
+@lru_cache(maxsize=1)
 def should_send_to_logfire() -> bool:
     """Determine if telemetry should be sent to Logfire based on environment.
 
     Rules:
+    - _100X_FORCE_LOGFIRE=1 (or 0) forces the answer, for tests that toggle it
     - Don't send when tests are running
     - Don't send if no token configured
     - Send in all other cases
 
+    The answer is fixed for the process lifetime, so it's computed once; call
+    should_send_to_logfire.cache_clear() to re-evaluate.
+
     Returns:
         bool: True if telemetry should be sent to Logfire
     """
+    forced = os.environ.get("_100X_FORCE_LOGFIRE")
+    if forced is not None:
+        return forced == "1"
+
     # Don't send when tests are running
     if "pytest" in sys.modules:
         return False
@@ -46,55 +84,60 @@ class UnifiedLogger:
     def __init__(self):
         self._span_depth = 0  # Track span nesting for pretty console output
 
+    @property
+    def enabled(self) -> bool:
+        """Whether telemetry is exported to Logfire (checked once at import)."""
+        return _SEND_TO_LOGFIRE
+
     def _format_attributes(self, **kwargs) -> str:
         """Format attributes nicely for console display."""
-        if not kwargs:
-            return ""
         # Only show most important attributes to avoid clutter
-        important_keys = [
-            "agent_name",
-            "model",
-            "operation",
-            "error_type",
-            "token_symbol",
-            "strategy_name",
-        ]
-        filtered = {
-            k: v for k, v in kwargs.items() if k in important_keys and v is not None
-        }
-        if not filtered:
+        if _CONSOLE_ATTRIBUTES.isdisjoint(kwargs):
+            return ""
+        attrs = " | ".join(
+            f"{k}={v}"
+            for k, v in kwargs.items()
+            if k in _CONSOLE_ATTRIBUTES and v is not None
+        )
+        if not attrs:
             return ""
-        attrs = " | ".join(f"{k}={v}" for k, v in filtered.items())
         return f" [{attrs}]"
 
+    def _console_message(self, message: str, **kwargs) -> str:
+        """Indent message for the current span depth and append attributes."""
+        attrs = self._format_attributes(**kwargs)
+        if not self._span_depth and not attrs:
+            return message  # Common case - nothing to add, so don't copy
+        return f"{'  ' * self._span_depth}{message}{attrs}"
+
     def info(self, message: str, **kwargs):
         """Log info to both logfire and loguru."""
-        indent = "  " * self._span_depth
-        logger.info(f"{indent}{message}{self._format_attributes(**kwargs)}")
+        if _console_enabled(_INFO):
+            logger.info(self._console_message(message, **kwargs))
         _logfire.info(message, **kwargs)
 
     def error(self, message: str, **kwargs):
         """Log error to both systems."""
-        indent = "  " * self._span_depth
-        logger.error(f"{indent}{message}{self._format_attributes(**kwargs)}")
+        if _console_enabled(_ERROR):
+            logger.error(self._console_message(message, **kwargs))
         _logfire.error(message, **kwargs)
 
     def exception(self, message: str, **kwargs):
         """Log exception to both systems with traceback."""
-        indent = "  " * self._span_depth
-        logger.exception(f"{indent}{message}{self._format_attributes(**kwargs)}")
+        if _console_enabled(_ERROR):
+            logger.exception(self._console_message(message, **kwargs))
         _logfire.exception(message, **kwargs)
 
     def warning(self, message: str, **kwargs):
         """Log warning to both systems."""
-        indent = "  " * self._span_depth
-        logger.warning(f"{indent}{message}{self._format_attributes(**kwargs)}")
+        if _console_enabled(_WARNING):
+            logger.warning(self._console_message(message, **kwargs))
         _logfire.warning(message, **kwargs)
 
     def debug(self, message: str, **kwargs):
         """Log debug to both systems."""
-        indent = "  " * self._span_depth
-        logger.debug(f"{indent}{message}{self._format_attributes(**kwargs)}")
+        if _console_enabled(_DEBUG):
+            logger.debug(self._console_message(message, **kwargs))
         _logfire.debug(message, **kwargs)
 
     @contextmanager
@@ -108,9 +151,10 @@ class UnifiedLogger:
               💸 Calling LLM
         """
         # Log span entry to console
-        logger.info(
-            f"{'  ' * self._span_depth}▶ {name}{self._format_attributes(**kwargs)}"
-        )
+        if _console_enabled(_INFO):
+            logger.info(
+                f"{'  ' * self._span_depth}▶ {name}{self._format_attributes(**kwargs)}"
+            )
 
         # Track nesting depth for indentation
         self._span_depth += 1
@@ -145,12 +189,15 @@ class UnifiedLogger:
 # Create unified logger instance
 logfire = UnifiedLogger()
 
+# Resolve once - environment doesn't change during a process lifetime
+_SEND_TO_LOGFIRE = should_send_to_logfire()
+
 # Configure Logfire with intelligent environment detection
 if config.logfire_token:
     _logfire.configure(
         token=config.logfire_token,
         service_name="100x",
-        send_to_logfire=should_send_to_logfire(),
+        send_to_logfire=_SEND_TO_LOGFIRE,
         scrubbing=False,
         console=False,  # Disable console output (project URL message)
     )
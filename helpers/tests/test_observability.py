@@ -2,6 +2,7 @@
 
 import pytest
 
+from helpers import observability
 from helpers.observability import UnifiedLogger
 
 
@@ -46,6 +47,21 @@ class TestUnifiedLogger:
             f"{message} [error_type=timeout | agent_name=Maya]"
         )
 
+    def test_disabled_console_level_skips_formatting(self, unified_logger, mocker):
+        """Test that levels no loguru sink accepts skip console work, not logfire."""
+        mock_logfire = mocker.patch("helpers.observability._logfire")
+        mock_logger = mocker.patch("helpers.observability.logger")
+        mocker.patch.object(observability._loguru._core, "min_level", 20)  # INFO
+        format_attributes = mocker.spy(unified_logger, "_format_attributes")
+
+        unified_logger.debug("Noisy detail", agent_name="Patrick")
+        unified_logger.info("Visible", agent_name="Patrick")
+
+        mock_logger.debug.assert_not_called()
+        mock_logger.info.assert_called_once_with("Visible [agent_name=Patrick]")
+        assert format_attributes.call_count == 1
+        mock_logfire.debug.assert_called_once_with("Noisy detail", agent_name="Patrick")
+
     def test_span_creates_logfire_span_and_logs_entry(self, unified_logger, mocker):
         """Test that span creates a logfire span and logs entry to console."""
         mock_logfire = mocker.patch("helpers.observability._logfire")
@@ -116,6 +132,12 @@ class TestUnifiedLogger:
         # Depth should reset to 0 after exception
         assert unified_logger._span_depth == 0
 
+    def test_plain_message_is_passed_through_unchanged(self, unified_logger):
+        """Test that a top-level message without attributes isn't rebuilt."""
+        message = "".join(["Plain ", "message"])  # Built at runtime, not interned
+
+        assert unified_logger._console_message(message, extra="x") is message
+
     def test_format_attributes_filters_unimportant_keys(self, unified_logger):
         """Test that _format_attributes only shows important keys."""
         kwargs = {
@@ -153,3 +175,32 @@ class TestUnifiedLogger:
 
         result = unified_logger._format_attributes(unimportant="data")
         assert result == ""
+
+
+class TestShouldSendToLogfire:
+    """Test suite for should_send_to_logfire."""
+
+    @pytest.fixture(autouse=True)
+    def _fresh_answer(self):
+        """Re-evaluate the cached answer around each test."""
+        observability.should_send_to_logfire.cache_clear()
+        yield
+        observability.should_send_to_logfire.cache_clear()
+
+    def test_never_sends_under_pytest(self, monkeypatch):
+        """Test that telemetry is disabled while tests run, even with a token."""
+        monkeypatch.delenv("_100X_FORCE_LOGFIRE", raising=False)
+        monkeypatch.setattr(observability.config, "logfire_token", "token")
+
+        assert observability.should_send_to_logfire() is False
+
+    def test_force_override(self, monkeypatch):
+        """Test that the env override wins, and is picked up after cache_clear."""
+        monkeypatch.setenv("_100X_FORCE_LOGFIRE", "1")
+        assert observability.should_send_to_logfire() is True
+
+        monkeypatch.setenv("_100X_FORCE_LOGFIRE", "0")
+        assert observability.should_send_to_logfire() is True  # Still cached
+
+        observability.should_send_to_logfire.cache_clear()
+        assert observability.should_send_to_logfire() is False
@@ -1,7 +1,9 @@
 #!/usr/bin/env python3
 """Pre-commit wrapper for validating .agent.md files."""
 
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+import os
 import sys
 
 
@@ -25,19 +27,20 @@ def main():
         # Dependencies not installed - skip silently
         return 0
 
-    # Validate all files
+    # Validate all files, in parallel when pre-commit passes several
     validator = AgentValidator()
-    results = {}
-
-    for file_path in agent_files:
-        errors = validator.validate_file(Path(file_path))
-        if errors:
-            results[file_path] = errors
+    max_workers = min(32, (os.cpu_count() or 1) * 4, len(agent_files))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        all_errors = executor.map(validator.validate_file, map(Path, agent_files))
+        results = {
+            file_path: errors
+            for file_path, errors in zip(agent_files, all_errors, strict=True)
+            if errors
+        }
 
     # Show errors if any
     if results:
-        output = format_validation_results(results, "human")
-        print(output, file=sys.stderr)  # noqa: T201
+        format_validation_results(results, "human", out=sys.stderr)
         return 1
 
     return 0
@@ -0,0 +1,116 @@
+"""Shared fixtures for project-level tests."""
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import UTC, datetime
+from pathlib import Path
+import hashlib
+import subprocess
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+REQUIREMENTS_IN = PROJECT_ROOT / "requirements" / "requirements.in"
+
+# Commands run by the fixtures below
+_UV_VERSION_COMMAND = ("uv", "--version")
+_UV_COMPILE_COMMAND = ("uv", "pip", "compile", str(REQUIREMENTS_IN))
+_UV_CHECK_COMMAND = ("uv", "pip", "check")
+
+# Session fixtures backed by a uv subprocess, started together by uv_results
+_UV_FIXTURES = ("uv_compile_result", "uv_check_result")
+
+
+def _run(command: tuple[str, ...]) -> subprocess.CompletedProcess:
+    """Run a command to completion, capturing its output as text."""
+    return subprocess.run(command, check=False, capture_output=True, text=True)
+
+
+def _compile_requirements(config) -> subprocess.CompletedProcess:
+    """Compile requirements.in with uv, skipping inputs already known to compile.
+
+    Successful compiles are remembered in pytest's cache, keyed on the contents
+    of requirements.in, the uv version and today's UTC date. Unchanged inputs
+    skip the resolve for the rest of the day, and it runs again at least daily
+    so index-side changes (yanked or newly conflicting releases) are caught.
+    Failures are never cached.
+    """
+    # The cache plugin may be disabled (-p no:cacheprovider)
+    cache = getattr(config, "cache", None)
+    if cache is not None:
+        uv_version = _run(_UV_VERSION_COMMAND).stdout
+        digest = hashlib.sha256(REQUIREMENTS_IN.read_bytes())
+        digest.update(uv_version.encode())
+        digest.update(datetime.now(UTC).date().isoformat().encode())
+        cache_key = f"reqcompile/{digest.hexdigest()}"
+        if cache.get(cache_key, None) == "ok":
+            return subprocess.CompletedProcess(_UV_COMPILE_COMMAND, 0, "", "")
+
+    # Without -o uv prints the lock to stdout, which is captured and discarded,
+    # so nothing is written to disk
+    result = _run(_UV_COMPILE_COMMAND)
+    if cache is not None and result.returncode == 0:
+        cache.set(cache_key, "ok")
+    return result
+
+
+def _check_dependencies() -> subprocess.CompletedProcess:
+    """Run ``uv pip check`` on the current environment."""
+    return _run(_UV_CHECK_COMMAND)
+
+
+def _will_run(item: pytest.Item) -> bool:
+    """Whether a collected test isn't statically skipped.
+
+    Only literal skip conditions are evaluated; string conditions count as
+    "might run", so their fixtures are still started.
+    """
+    if item.get_closest_marker("skip"):
+        return False
+    for marker in item.iter_markers("skipif"):
+        conditions = marker.args or (marker.kwargs.get("condition"),)
+        if any(condition is True for condition in conditions):
+            return False
+    return True
+
+
+@pytest.fixture(scope="session")
+def uv_results(request):
+    """Start every uv command this session needs at once, in background threads.
+
+    The commands are independent and read-only, so running them concurrently
+    makes the wait the slowest command rather than the sum of all of them.
+    """
+    needed = {
+        name
+        for item in request.session.items
+        if _will_run(item)
+        for name in _UV_FIXTURES
+        if name in item.fixturenames
+    }
+    with ThreadPoolExecutor(max_workers=len(_UV_FIXTURES)) as executor:
+        futures: dict[str, Future] = {}
+        if "uv_compile_result" in needed:
+            futures["uv_compile_result"] = executor.submit(
+                _compile_requirements, request.config
+            )
+        if "uv_check_result" in needed:
+            futures["uv_check_result"] = executor.submit(_check_dependencies)
+        yield futures
+
+
+@pytest.fixture(scope="session")
+def uv_compile_result(request, uv_results) -> subprocess.CompletedProcess:
+    """Result of compiling requirements.in with uv, run once per test session."""
+    future = uv_results.get("uv_compile_result")
+    if future is None:
+        return _compile_requirements(request.config)
+    return future.result()
+
+
+@pytest.fixture(scope="session")
+def uv_check_result(uv_results) -> subprocess.CompletedProcess:
+    """Result of ``uv pip check`` on the current environment, run once per session."""
+    future = uv_results.get("uv_check_result")
+    if future is None:
+        return _check_dependencies()
+    return future.result()
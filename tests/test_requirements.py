@@ -1,47 +1,59 @@
 """Test requirements files for common deployment errors."""
 
 from pathlib import Path
-import subprocess
+import os
 
+from packaging.requirements import InvalidRequirement, Requirement
+import pytest
 
-def test_requirements_files_exist():
-    """Verify all required requirements files exist."""
-    project_root = Path(__file__).parent.parent
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+REQUIREMENTS_DIR = PROJECT_ROOT / "requirements"
+REQUIREMENTS_IN = REQUIREMENTS_DIR / "requirements.in"
 
-    assert (project_root / "requirements" / "requirements.in").exists()
-    assert (project_root / "requirements" / "requirements.txt").exists()
-    assert (project_root / "requirements" / "requirements-dev.txt").exists()
-    assert (project_root / "requirements" / "requirements-test.txt").exists()
 
-
-def test_requirements_in_compiles():
+def test_requirements_files_exist():
+    """Verify all required requirements files exist."""
+    # One directory listing instead of a stat per file
+    with os.scandir(REQUIREMENTS_DIR) as entries:
+        names = {entry.name for entry in entries}
+
+    expected = {
+        "requirements.in",
+        "requirements.txt",
+        "requirements-dev.txt",
+        "requirements-test.txt",
+    }
+    assert expected <= names, f"Missing requirements files: {sorted(expected - names)}"
+
+
+def test_requirements_in_parses():
+    """Verify every entry in requirements.in is a valid requirement specifier."""
+    for line in REQUIREMENTS_IN.read_text().splitlines():
+        entry = line.split("#", 1)[0].strip()
+        # Skip blanks and pip options such as -r / -c
+        if not entry or entry.startswith("-"):
+            continue
+        try:
+            Requirement(entry)
+        except InvalidRequirement as e:
+            pytest.fail(f"Invalid entry in requirements.in: {entry!r} ({e})")
+
+
+@pytest.mark.slow
+@pytest.mark.skipif(
+    not os.environ.get("RUN_SLOW_TESTS"),
+    reason="full dependency resolve is slow; set RUN_SLOW_TESTS=1 to run",
+)
+def test_requirements_in_compiles(uv_compile_result):
     """Verify requirements.in compiles without errors."""
-    import tempfile
-
-    project_root = Path(__file__).parent.parent
-    requirements_in = project_root / "requirements" / "requirements.in"
-
-    # Compile to a temp file to verify it works without modifying anything
-    with tempfile.NamedTemporaryFile(mode="w", suffix=".txt", delete=False) as tmp:
-        result = subprocess.run(
-            ["uv", "pip", "compile", str(requirements_in), "-o", tmp.name],
-            check=False,
-            capture_output=True,
-            text=True,
-        )
-        Path(tmp.name).unlink()  # Clean up
+    result = uv_compile_result
 
     assert result.returncode == 0, f"requirements.in failed to compile: {result.stderr}"
 
 
-def test_no_dependency_conflicts():
+def test_no_dependency_conflicts(uv_check_result):
     """Verify installed packages have no conflicts."""
     # uv pip check verifies no broken dependencies in the current environment
-    result = subprocess.run(
-        ["uv", "pip", "check"],
-        check=False,
-        capture_output=True,
-        text=True,
-    )
+    result = uv_check_result
 
     assert result.returncode == 0, f"Dependency conflicts found: {result.stdout}"